@@ -0,0 +1,3 @@
+ALTER TABLE IF EXISTS public.tb_auto_responses ADD COLUMN IF NOT EXISTS trigger_fsm TEXT;
+ALTER TABLE IF EXISTS public.tb_auto_responses ADD COLUMN IF NOT EXISTS trigger_fsm_version SMALLINT;
+ALTER TABLE IF EXISTS public.tb_auto_responses ADD COLUMN IF NOT EXISTS trigger_fsm_hash TEXT;
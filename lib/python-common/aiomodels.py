@@ -89,6 +89,30 @@ class Base:
 class TbAutoResponses(Base):
     __tablename__ = 'tb_auto_responses'
 
+    async def increment_counts(self, deltas):
+        """deltas are tuples of (id, number of new hits)"""
+        ids, counts = zip(*deltas)
+        async with (await self.pool()).acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f'''UPDATE {self.__class__.__tablename__} AS r SET
+                    count = r.count + d.delta
+                    FROM unnest($1::bigint[], $2::int[]) AS d(id, delta)
+                    WHERE r.id = d.id
+                    ''', list(ids), list(counts)
+                )
+
+    async def update_compiled(self, rows):
+        """rows are tuples of (id, response_ast, trigger_fsm, trigger_fsm_version, trigger_fsm_hash)"""
+        async with (await self.pool()).acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    f'''UPDATE {self.__class__.__tablename__} SET
+                    response_ast = $2, trigger_fsm = $3, trigger_fsm_version = $4, trigger_fsm_hash = $5
+                    WHERE id = $1
+                    ''', rows
+                )
+
 
 class TbReactEvents(Base):
     __tablename__ = 'tb_react_events'
@@ -136,6 +160,22 @@ class TbSettings(Base):
                     ''', id, *cols.values()
                 )
 
+    async def select_by_guild_ids(self, guild_ids):
+        async with (await self.pool()).acquire() as conn:
+            return await conn.fetch(
+                f'SELECT * FROM {self.__class__.__tablename__} WHERE guild_id = ANY($1::bigint[])', list(guild_ids))
+
+    async def insert_defaults(self, guild_ids):
+        """add empty settings for each guild, leaving guilds that already have a row alone"""
+        async with (await self.pool()).acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f'''INSERT INTO {self.__class__.__tablename__}(guild_id, json_blob)
+                    SELECT id, '{{}}' FROM unnest($1::bigint[]) AS g(id)
+                    ON CONFLICT (guild_id) DO NOTHING
+                    ''', list(guild_ids)
+                )
+
 
 class TwitchStream(Base):
     __tablename__ = 'tb_twitch_subs'
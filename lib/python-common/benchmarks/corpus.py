@@ -0,0 +1,144 @@
+"""
+Triggers, responses and messages shaped like the ones guilds actually set up, for the benchmarks.
+
+Triggers are in the form auto responses store them: lowercased, with punctuation removed or
+escaped by `generate_trigger_regex`, and regex mode triggers without their slashes.
+"""
+
+TRIGGERS = (
+    # naive and punctuated
+    "hello",
+    "hi",
+    "good bot",
+    "bad bot",
+    "f",
+    "owo",
+    "uwu",
+    "whats up",
+    "what's up\\?",
+    "hey there",
+    "ping",
+    "who asked",
+    "no u",
+    "gm",
+    "gn",
+    "lol",
+    "lmao",
+    "poggers",
+    "sus",
+    "among us",
+    "thank you architus",
+    "i love this server",
+    "where is everyone",
+    "can i get a role",
+    "rip",
+    "based",
+    "nice",
+    "69",
+    "420",
+    "e",
+    "this is fine",
+    "hello there",
+    "general kenobi",
+    "ok boomer",
+    "yeet",
+    "bruh",
+    "is the bot down\\?",
+    "who pinged me",
+    "anyone want to play",
+    "good morning",
+    # regex mode
+    "h(i+)",
+    "(.*) bot",
+    "i'?m (.*)",
+    "x{2,4}",
+    "[a-z]{1,5}",
+    "\\d+",
+    "[^abc]+x",
+    ".*hello.*",
+    "(\\w+ ){1,3}\\w+",
+    "(ha)+( ?lo+l)*",
+    "(yes|no|maybe)\\?",
+    "(lol|lmao|rofl)+",
+    "no+ ?u",
+    "pog(gers)?",
+    "[aeiou]{3,}",
+    ".+ and .+",
+    "\\W+",
+    "[0-9a-f]{2,}",
+    "(good|bad|best|worst) (bot|server|mod)s?",
+    "o+f+",
+    "(a|b)*a(a|b){5}",
+    ".*(cat|dog)s?.*",
+    "(\\w+)ing",
+    "wh(at|y|o|en|ere)\\?*",
+)
+
+RESPONSES = (
+    "hello",
+    "hi [author]!",
+    "good human",
+    ":(",
+    "[:thumbsup:]",
+    "[:pray:] [:sparkles:]",
+    "respects paid [<:press_f:431253543453245440>]",
+    "[<a:pepedance:739281793618346094>] [<a:pepedance:739281793618346094>]",
+    "[🎉 ] congrats",
+    "no [noun]",
+    "you're a [adj] [noun]",
+    "[adv] [adj] [noun]s everywhere",
+    "I'm [1], nice to meet you",
+    "[capture] yourself",
+    "[member] asked",
+    "[member], [member] and [member] are online",
+    "this has been said [count] times",
+    "[hi, hey, hello, howdy, sup] [author]",
+    "[yes, no, maybe, ask again later]",
+    "[[member], [author], nobody] did it",
+    "[good, great, [adj]] [morning, day, [noun]] to you",
+    "check out https://archit.us/ and [http://example.com, https://docs.archit.us]",
+    "see https://github.com/architus/architus/issues for that",
+    "escaped \\[brackets\\] and \\, commas",
+    "[eval p('hi')]",
+    "[eval p(choice(['a', 'b', 'c']))]",
+    "[e p(author.name + ' said ' + str(count))]",
+    "a [b, c] d [e, [f, g, [h, i]]]",
+    "[a, [b, c], , d]",
+    "this is a much longer response with [adj] words in it, [member], and a list of [several, a few, "
+    "many] options, plus [noun] and a [:smile:] react and https://archit.us/app at the end",
+)
+
+MESSAGES = (
+    "hello",
+    "hi",
+    "hiiiii",
+    "good bot",
+    "bad bot",
+    "the best bot",
+    "f",
+    "owo",
+    "what's up?",
+    "whats up",
+    "ping",
+    "who asked",
+    "noooo u",
+    "lol",
+    "lollmao",
+    "hahaha lool",
+    "poggers",
+    "pog",
+    "among us",
+    "i'm tired",
+    "im here",
+    "xxx",
+    "12345",
+    "deadbeef",
+    "cats and dogs",
+    "i love this server",
+    "anyone want to play among us later tonight",
+    "where is everyone?",
+    "this is a fairly long message that people sometimes send when they have a lot to say about "
+    "something that happened in the game yesterday",
+    "!!!",
+    "",
+)
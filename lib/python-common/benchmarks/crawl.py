@@ -0,0 +1,105 @@
+"""
+Times building Reggy automata with state interning against the old linear scan.
+
+Run from the directory containing `lib`:
+
+    python -m lib.benchmarks.crawl [--repeat N]
+
+The "linear" column swaps in the previous `crawl` and `reversed`, which looked states up with
+`list.index` and scanned every transition for predecessors.
+"""
+import argparse
+import time
+from array import array
+from unittest.mock import patch
+
+from lib.reggy import fsm
+from lib.reggy.reggy import Reggy
+
+# the slowest triggers to compile before states were interned
+REGEXES = (
+    r"(a|b)*a(a|b){6}",
+    r"(a|b)*a(a|b){8}",
+    r"(a|b)*a(a|b){9}",
+    r"(\w+ ){3,6}\w+",
+    r"(ab|cd|ef)*(gh|ij){2,5}",
+    r".*hello.*world.*",
+    r"(ha)+( ?lo+l)*",
+)
+
+
+def linear_crawl(alphabet, initial, accepts, follow):
+    states = [initial]
+    accepting = set()
+    transition = []
+
+    i = 0
+    while i < len(states):
+        state = states[i]
+        if accepts(state):
+            accepting.add(i)
+        row = array('i', [fsm.OBLIVION]) * len(alphabet)
+        for symbol in range(len(alphabet)):
+            try:
+                next_states = follow(state, symbol)
+            except fsm.OblivionError:
+                continue
+            try:
+                j = states.index(next_states)
+            except ValueError:
+                j = len(states)
+                states.append(next_states)
+            row[symbol] = j
+        transition.append(row)
+        i += 1
+
+    return fsm.FSM(
+        alphabet=alphabet,
+        states=range(len(states)),
+        initial=0,
+        accepting=accepting,
+        transition=transition,
+        __validation__=False
+    )
+
+
+def linear_reversed(self):
+    def follow(current, symbol):
+        next_states = frozenset([
+            prev
+            for prev in self.states
+            for state in current
+            if self.transition[prev][symbol] == state
+        ])
+        if len(next_states) == 0:
+            raise fsm.OblivionError
+        return next_states
+
+    return fsm.crawl(self.alphabet, frozenset(self.accepting), lambda state: self.initial in state, follow)
+
+
+def best_of(regex: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Reggy(regex)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'regex':<28} {'states':>6} {'interned':>10} {'linear':>10} {'speedup':>8}")
+    for regex in REGEXES:
+        states = len(Reggy(regex).fsm.states)
+        interned = best_of(regex, args.repeat)
+        with patch.object(fsm, 'crawl', linear_crawl), patch.object(fsm.FSM, 'reversed', linear_reversed):
+            linear = best_of(regex, args.repeat)
+        print(f"{regex:<28} {states:>6} {interned:>9.4f}s {linear:>9.4f}s {linear / interned:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Checks Reggy FSM acceptance against RE2 `fullmatch` on random regex/string pairs.
+
+Run from the directory containing `lib`:
+
+    python -m lib.benchmarks.fuzz [--cases N] [--seed S]
+
+Every generated regex comes with a sampler for strings it matches. Each case tests
+some of those strings, mutated copies of them and random noise, so both sides of
+the language boundary get exercised. Failing cases are printed with a seed that
+reproduces them.
+"""
+import argparse
+import random
+import string
+from typing import Callable, List, Optional, Tuple
+
+import re2
+
+from lib.reggy import fsm
+from lib.reggy.reggy import Reggy, NotParseable, TooComplex
+
+# newline is left out since `.` matches it in reggy but not in RE2
+ALPHABET = "abcxyz019 _.-*+?()[]|\t"
+LITERALS = "abcxyz019 _"
+ESCAPED = ".*+?()[]|-"
+SHORTHANDS = {
+    '\\d': string.digits,
+    '\\D': "abcxyz _.-?",
+    '\\w': string.ascii_lowercase + string.digits + "_",
+    '\\W': " .-*+?()[]|\t",
+    '\\s': " \t",
+    '\\S': "abcxyz019_.-?",
+    '.': ALPHABET,
+}
+BRACKETS = ("abc", "a-c", "0-9", "x-z_", "ab1", "a", "-a", "a-", "a-c0-9", "\\.x", "_\\-")
+QUANTIFIERS = (("*", 0, 3), ("+", 1, 3), ("?", 0, 1), ("{2}", 2, 2), ("{1,3}", 1, 3), ("{0,2}", 0, 2),
+               ("{2,}", 2, 4))
+
+# cases that take longer than this to build are skipped rather than reported
+BUDGET = fsm.Budget(max_states=5000, seconds=1)
+
+Sampler = Callable[[random.Random], str]
+
+
+def _bracket(rng: random.Random) -> Tuple[str, Sampler]:
+    body = rng.choice(BRACKETS)
+    negated = rng.random() < 0.3
+    members = set(re2.findall(f"[{body}]", ALPHABET))
+    pool = sorted(set(ALPHABET) - members if negated else members)
+    return f"[{'^' if negated else ''}{body}]", lambda r: r.choice(pool)
+
+
+def _atom(rng: random.Random, depth: int) -> Tuple[str, Sampler]:
+    roll = rng.random()
+    if depth < 2 and roll < 0.2:
+        branches = [random_regex(rng, depth + 1) for _ in range(rng.randint(1, 3))]
+        return "(" + "|".join(b[0] for b in branches) + ")", lambda r: r.choice(branches)[1](r)
+    if roll < 0.55:
+        char = rng.choice(LITERALS)
+        return char, lambda r: char
+    if roll < 0.65:
+        shorthand = rng.choice(list(SHORTHANDS))
+        return shorthand, lambda r: r.choice(SHORTHANDS[shorthand])
+    if roll < 0.85:
+        return _bracket(rng)
+    char = rng.choice(ESCAPED)
+    return "\\" + char, lambda r: char
+
+
+def _quantified(rng: random.Random, depth: int) -> Tuple[str, Sampler]:
+    regex, sample = _atom(rng, depth)
+    if rng.random() < 0.6:
+        return regex, sample
+    quantifier, low, high = rng.choice(QUANTIFIERS)
+    return regex + quantifier, lambda r: "".join(sample(r) for _ in range(r.randint(low, high)))
+
+
+def random_regex(rng: random.Random, depth: int = 0) -> Tuple[str, Sampler]:
+    """
+    A random regex in the subset reggy supports, with a sampler for strings it fully matches.
+    """
+    parts = [_quantified(rng, depth) for _ in range(rng.randint(1, 4))]
+    return "".join(p[0] for p in parts), lambda r: "".join(p[1](r) for p in parts)
+
+
+def _mutate(rng: random.Random, s: str) -> str:
+    i = rng.randint(0, len(s))
+    roll = rng.random()
+    if roll < 0.4 and s:
+        return s[:max(i - 1, 0)] + s[i:]
+    if roll < 0.7 and i < len(s):
+        return s[:i] + rng.choice(ALPHABET) + s[i + 1:]
+    return s[:i] + rng.choice(ALPHABET) + s[i:]
+
+
+def random_strings(rng: random.Random, sample: Sampler, n: int) -> List[str]:
+    strings = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.4:
+            strings.append(sample(rng))
+        elif roll < 0.8:
+            strings.append(_mutate(rng, sample(rng)))
+        else:
+            strings.append("".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 6))))
+    return strings
+
+
+def check(seed: int, strings: int = 30) -> Optional[Tuple[str, str, bool, bool]]:
+    """
+    Runs the case for a seed. Returns (regex, string, fsm result, RE2 result) for the first
+    disagreement, or None when they agree or reggy doesn't handle the regex.
+    """
+    rng = random.Random(seed)
+    regex, sample = random_regex(rng)
+    try:
+        reggy = Reggy(regex, budget=BUDGET)
+    except (NotParseable, TooComplex):
+        return None
+    pattern = re2.compile(regex)
+    for s in random_strings(rng, sample, strings):
+        expected = pattern.fullmatch(s) is not None
+        if reggy.fsm.accepts(s) != expected:
+            return regex, s, not expected, expected
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--cases', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first case")
+    parser.add_argument('--strings', type=int, default=30, help="strings tested per regex")
+    args = parser.parse_args()
+
+    failures = 0
+    for seed in range(args.seed, args.seed + args.cases):
+        failure = check(seed, args.strings)
+        if failure is not None:
+            failures += 1
+            regex, s, got, expected = failure
+            print(f"seed {seed}: {regex!r} on {s!r}, fsm says {got}, re2 says {expected}")
+    print(f"{failures} of {args.cases} cases disagreed")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
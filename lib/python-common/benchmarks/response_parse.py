@@ -0,0 +1,172 @@
+"""
+Times parsing long responses against the previous parser, which was quadratic in the response length.
+
+Run from the directory containing `lib`:
+
+    python -m lib.benchmarks.response_parse [--repeat N]
+
+`reference_parse` is that parser, kept to check the current one produces the same trees and errors.
+"""
+import argparse
+import random
+import time
+
+import re2 as re
+
+from lib.response_grammar import response
+
+url = re.compile("(https?://[\\w\\.-]{2,})/?")
+eval_token = re.compile(r"\A\[(?:eval|e) (.*)\]")
+
+PIECES = (
+    "hello ", "[noun] ", "[adj]", "[member], ", "[:thumbsup:] ", "[<:pog:123456789>]", "[1] ", "[capture]",
+    "[a, b, c] ", "[[member], [author]] ", "https://archit.us/ ", "see http://example.com, ", "\\, ", "\\[ ",
+    "[e p('hi')]\n", "[", "]", ", ", "x",
+)
+
+KEYWORDS = (
+    ('[adv]', response.NodeType.Adv),
+    ('[adj]', response.NodeType.Adj),
+    ('[noun]', response.NodeType.Noun),
+    ('[count]', response.NodeType.Count),
+    ('[member]', response.NodeType.Member),
+    ('[author]', response.NodeType.Author),
+    ('[capture]', response.NodeType.Capture),
+)
+
+
+def reference_parse(string):
+    # children of the list element being parsed, or of the root outside any list
+    curr = []
+    # for each open list, the children it is inside of and its finished elements
+    stack = []
+    i = 0
+    while i < len(string):
+        root_ctx = not stack
+        if string[i] == '[' and string.find(']', i) == -1:
+            raise response.ParseError("Unmatched bracket", i)
+        if string[i] == ']':
+            if root_ctx:
+                raise response.ParseError("This bracket has no opening bracket", i + 1)
+            parent, elements = stack.pop()
+            elements.append(response.Node(response.NodeType.ListElement, children=tuple(curr)))
+            parent.append(response.Node(response.NodeType.List, children=tuple(elements)))
+            curr = parent
+            i += 1
+            continue
+        elif string[i] == '[':
+            j, a, shortcode, cid, uni = response.parse_react(string, i)
+            k, capture = response.parse_capture(string, i)
+            if shortcode is not None:
+                curr.append(response.leaf(response.NodeType.React, string[i:j], shortcode, cid, a, uni))
+                i = j
+                continue
+            elif capture is not None:
+                curr.append(response.leaf(response.NodeType.Capture, string[i:k], capture))
+                i = k
+                continue
+            for keyword, node_type in KEYWORDS:
+                if string[i:i + len(keyword)].lower() == keyword:
+                    curr.append(response.leaf(node_type, string[i:i + len(keyword)]))
+                    i += len(keyword)
+                    break
+            else:
+                if m := eval_token.search(string[i:]):
+                    curr.append(response.Node(response.NodeType.Eval, m.group(1)))
+                    i += m.end()
+                else:
+                    stack.append((curr, []))
+                    curr = []
+                    i += 1
+            continue
+        elif string[i] == "," and not root_ctx:
+            stack[-1][1].append(response.Node(response.NodeType.ListElement, children=tuple(curr)))
+            curr = []
+            i += 1
+        else:
+            text = ""
+            while i < len(string) and string[i] != "[" and string[i] != "]":
+                if string[i] == "\\":
+                    text += string[i + 1]
+                    i += 2
+                    continue
+                if string[i] != " ":
+                    ends = [string.find(" ", i), string.find("]", i), string.find(",", i)]
+                    end = len(string)
+                    for e in ends:
+                        if e != -1 and e < end:
+                            end = e
+                    m = url.fullmatch(string[i:end])
+                    if m is not None:
+                        if text != "":
+                            curr.append(response.Node(response.NodeType.PlainText, text))
+                        curr.append(response.Node(response.NodeType.Url, string[i:end]))
+                        text = ""
+                        i = end
+                        continue
+                if string[i] == "," and not root_ctx:
+                    break
+                text += string[i]
+                i += 1
+            if text != "":
+                curr.append(response.Node(response.NodeType.PlainText, text))
+
+    if stack:
+        raise response.ParseError("Missed a closing bracket somewhere", len(string))
+    return response.Response(tuple(curr))
+
+
+def long_response(length: int, seed: int = 0) -> str:
+    """
+    A response of about `length` characters made of typical pieces, with every list closed.
+    """
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    depth = 0
+    while size < length:
+        piece = rng.choice(PIECES)
+        if piece == "[":
+            depth += 1
+        elif piece == "]":
+            if depth == 0:
+                continue
+            depth -= 1
+        parts.append(piece)
+        size += len(piece)
+    return "".join(parts) + "]" * depth
+
+
+def best_of(parse, string: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            parse(string)
+        except response.ParseError:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    shapes = (
+        ('mixed', long_response),
+        ('lists', lambda length: "[a, b] " * (length // 7)),
+        ('one word', lambda length: "ha" * (length // 2)),
+    )
+    print(f"{'shape':<10} {'length':>8} {'current':>10} {'previous':>10} {'speedup':>8}")
+    for name, make in shapes:
+        for length in (250, 1000, 4000, 16000, 64000):
+            string = make(length)
+            current = best_of(response.parse, string, args.repeat)
+            previous = best_of(reference_parse, string, args.repeat)
+            print(f"{name:<10} {len(string):>8} {current:>9.4f}s {previous:>9.4f}s {previous / current:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
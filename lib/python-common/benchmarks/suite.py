@@ -0,0 +1,163 @@
+"""
+Times the reggy and response grammar stages over the benchmark corpus and compares them to a baseline.
+
+Run from the directory containing `lib`:
+
+    python -m lib.benchmarks.suite [--repeat N] [--baseline PATH] [--save]
+
+Each stage reports the best of N timed runs and the peak memory traced during one more run.
+Separately, the memory kept alive by parsed trigger patterns and response trees is reported per
+item, as that is what stays resident in a shard.
+The stored baseline is machine specific, so record one with `--save` on the machine you are
+comparing on before making a change.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from itertools import combinations
+from typing import Callable, Dict, List, Tuple
+
+from lib.benchmarks.corpus import TRIGGERS, RESPONSES, MESSAGES
+from lib.reggy import fsm
+from lib.reggy.reggy import Pattern
+from lib.response_grammar.response import parse as parse_response
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def stages() -> List[Tuple[str, Callable[[], object]]]:
+    """
+    The benchmarked stages in order, each a callable doing the stage's work over the whole corpus.
+    Inputs for a stage are prepared by running the stages before it once.
+    """
+    patterns = [Pattern.parse(t) for t in TRIGGERS]
+    fsms = [p.to_fsm() for p in patterns]
+    reduced = [f.reduce() for f in fsms]
+
+    def accepts():
+        for f in reduced:
+            for m in MESSAGES:
+                f.accepts(m)
+
+    found = [
+        ('parse', lambda: [Pattern.parse(t) for t in TRIGGERS]),
+        ('compile', lambda: [p.to_fsm() for p in patterns]),
+        ('minimize', lambda: [f.reduce() for f in fsms]),
+        ('isdisjoint', lambda: [a.isdisjoint(b) for a, b in combinations(reduced, 2)]),
+        ('accepts', accepts),
+    ]
+    if fsm.np is not None:
+        found.append(('accepts_many', lambda: [f.accepts_many(MESSAGES) for f in reduced]))
+    found.append(('response_parse', lambda: [parse_response(r) for r in RESPONSES]))
+    return found
+
+
+def measure(stage: Callable[[], object], repeat: int) -> Dict[str, float]:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_kib': peak / 1024}
+
+
+def retained_bytes(build: Callable[[], list], copies: int = 20) -> float:
+    """
+    Bytes still allocated per item after `build` runs `copies` times, once its garbage is collected.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        kept = [build() for _ in range(copies)]
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (after - before) / sum(len(k) for k in kept)
+
+
+def run(repeat: int) -> dict:
+    return {
+        'python': platform.python_version(),
+        'corpus': {'triggers': len(TRIGGERS), 'responses': len(RESPONSES), 'messages': len(MESSAGES)},
+        'stages': {name: measure(stage, repeat) for name, stage in stages()},
+        'retained': {
+            'bytes/trigger': retained_bytes(lambda: [Pattern.parse(t) for t in TRIGGERS]),
+            'bytes/response': retained_bytes(lambda: [parse_response(r) for r in RESPONSES]),
+        },
+    }
+
+
+def change(old, new) -> str:
+    if old is None or old == 0:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def table(current: dict, baseline: dict) -> str:
+    old_stages = baseline.get('stages', {})
+    lines = [
+        f"{'stage':<16} {'baseline':>10} {'current':>10} {'change':>8}   "
+        f"{'base peak':>11} {'peak':>11} {'change':>8}"
+    ]
+    for name, new in current['stages'].items():
+        old = old_stages.get(name, {})
+        old_seconds, old_peak = old.get('seconds'), old.get('peak_kib')
+        lines.append(
+            f"{name:<16} "
+            f"{'-' if old_seconds is None else f'{old_seconds * 1000:.2f}ms':>10} "
+            f"{new['seconds'] * 1000:>8.2f}ms "
+            f"{change(old_seconds, new['seconds']):>8}   "
+            f"{'-' if old_peak is None else f'{old_peak:.1f}KiB':>11} "
+            f"{new['peak_kib']:>8.1f}KiB "
+            f"{change(old_peak, new['peak_kib']):>8}"
+        )
+
+    old_retained = baseline.get('retained', {})
+    lines.append("")
+    lines.append(f"{'retained':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, new in current['retained'].items():
+        old = old_retained.get(name)
+        lines.append(f"{name:<16} {'-' if old is None else f'{old:.0f}':>10} {new:>10.0f} {change(old, new):>8}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline to compare against and save to")
+    parser.add_argument('--save', action='store_true', help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    current = run(args.repeat)
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    if baseline and baseline.get('corpus') != current['corpus']:
+        print("the corpus changed since the baseline was recorded, results are not comparable")
+
+    print(table(current, baseline))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"saved baseline to {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,22 @@ FAKE_GUILD_IDS = 10000000
 
 DISCORD_EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
 
+# how often (seconds) and at how many pending responses buffered auto response hit counts are written
+RESPONSE_COUNT_FLUSH_INTERVAL = float(os.getenv('response_count_flush_interval', 30))
+RESPONSE_COUNT_FLUSH_SIZE = int(os.getenv('response_count_flush_size', 500))
+# seconds between a guild setting changing and its settings being written, later changes share the write
+SETTINGS_FLUSH_INTERVAL = float(os.getenv('settings_flush_interval', 5))
+# how many guilds keep their compiled auto responses in memory at once
+RESPONSE_CACHE_GUILDS = int(os.getenv('response_cache_guilds', 500))
+# packed word lists for auto responses, shards pointing at the same file share its pages
+WORD_STORE_PATH = os.getenv('word_store_path', '/tmp/architus-words.pack')
+# how many compiled triggers no loaded response uses are kept for when another guild sets the same one
+REGGY_CACHE_SIZE = int(os.getenv('reggy_cache_size', 2000))
+# limits on compiling a trigger into an FSM: states in any one step, character classes, and seconds
+REGEX_MAX_STATES = int(os.getenv('regex_max_states', 20000))
+REGEX_MAX_ALPHABET = int(os.getenv('regex_max_alphabet', 512))
+REGEX_COMPILE_SECONDS = float(os.getenv('regex_compile_seconds', 5))
+
 try:
     NUM_SHARDS = int(os.environ['NUM_SHARDS'])
 
@@ -0,0 +1,87 @@
+"""
+Process wide cache of compiled Reggys, shared by every trigger with the same regex.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict
+
+from lib.reggy.reggy import Reggy
+
+
+class ReggyHandle:
+    """
+    A reference to a cached Reggy. The Reggy stays usable after the handle is
+    released, releasing only lets the cache forget about it.
+    """
+    __slots__ = ('regex', 'reggy', 'refs')
+
+    def __init__(self, regex: str, reggy: Reggy):
+        self.regex = regex
+        self.reggy = reggy
+        self.refs = 0
+
+
+class ReggyCache:
+    """
+    Compiled Reggys keyed by regex. Entries are reference counted while
+    something holds a handle to them, and up to `max_unused` entries nobody
+    holds are kept around, dropping the least recently released first.
+
+    Handles are taken from executor threads, so everything is done under a lock
+    except building a missing Reggy.
+    """
+
+    def __init__(self, max_unused: int = 1000):
+        self.max_unused = max_unused
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, ReggyHandle] = {}
+        self._unused = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, regex: str) -> bool:
+        return regex in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _take(self, handle: ReggyHandle) -> ReggyHandle:
+        handle.refs += 1
+        self._unused.pop(handle.regex, None)
+        return handle
+
+    def acquire(self, regex: str, build: Callable[[], Reggy]) -> ReggyHandle:
+        """
+        A handle to the Reggy for a regex, calling `build` to make it if it isn't cached.
+        """
+        with self._lock:
+            handle = self._entries.get(regex)
+            if handle is not None:
+                self.hits += 1
+                return self._take(handle)
+            self.misses += 1
+
+        reggy = build()
+        with self._lock:
+            # another thread may have built the same regex in the meantime
+            handle = self._entries.setdefault(regex, ReggyHandle(regex, reggy))
+            return self._take(handle)
+
+    def release(self, handle: ReggyHandle) -> None:
+        with self._lock:
+            if handle.refs <= 0:
+                return
+            handle.refs -= 1
+            if handle.refs == 0 and self._entries.get(handle.regex) is handle:
+                self._unused[handle.regex] = handle
+                while len(self._unused) > self.max_unused:
+                    regex, _ = self._unused.popitem(last=False)
+                    del self._entries[regex]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'unused': len(self._unused),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
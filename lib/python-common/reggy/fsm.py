@@ -1,8 +1,23 @@
 """
 Finite state machine library
+
+Transitions aren't kept per character. The characters an FSM cares about are split into disjoint
+classes that it can't tell apart, and each state has a dense row holding the next state for every
+class, or OBLIVION if there isn't one.
 """
 
-from typing import Any, Set, Dict
+import string
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from time import monotonic
+from typing import Callable, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class UnspecifiedCharacter:
@@ -24,6 +39,15 @@ class UnspecifiedCharacter:
 
 unspecified = UnspecifiedCharacter()
 
+# the entry in a transition row for a class that has nowhere to go
+OBLIVION = -1
+
+# the order characters are tried in when picking an example of a class
+READABLE = string.ascii_lowercase + string.digits + " " + string.punctuation + string.ascii_uppercase
+
+# how many strings `accepts_many` needs before it runs them through NumPy by default
+VECTORIZE_MIN_STRINGS = 2048
+
 
 class OblivionError(Exception):
     """
@@ -33,13 +57,146 @@ class OblivionError(Exception):
     pass
 
 
+class BudgetExceeded(Exception):
+    """
+    Raised by `crawl` when building an FSM goes over the active Budget.
+    `reason` is one of 'states', 'alphabet' or 'deadline'.
+    """
+
+    def __init__(self, reason, limit):
+        super().__init__(reason, limit)
+        self.reason = reason
+        self.limit = limit
+
+
+class Budget:
+    """
+    Limits on the FSMs `crawl` builds while the budget is active: how many
+    states any one of them may have, how many character classes its alphabet
+    may have, and how many seconds may pass. None means no limit.
+    """
+
+    def __init__(self, max_states=None, max_alphabet=None, seconds=None):
+        self.max_states = max_states
+        self.max_alphabet = max_alphabet
+        self.seconds = seconds
+
+
+# the budget in force and its deadline, see `limited`
+_active_budget = ContextVar('fsm_budget', default=None)
+
+
+@contextmanager
+def limited(budget):
+    """
+    Enforce a Budget on every FSM built inside the block, with its deadline
+    counted from entering it. A budget of None doesn't limit anything.
+    """
+    if budget is None:
+        yield
+        return
+    deadline = None if budget.seconds is None else monotonic() + budget.seconds
+    token = _active_budget.set((budget, deadline))
+    try:
+        yield
+    finally:
+        _active_budget.reset(token)
+
+
+class Alphabet:
+    """
+    A partition of every character into disjoint classes. Class 0 holds all of
+    the characters that aren't listed in any other class, which is what the
+    `unspecified` symbol stands for.
+    """
+
+    def __init__(self, classes: Sequence[FrozenSet[str]]):
+        self.classes = tuple(frozenset(chars) for chars in classes)
+        if not self.classes or self.classes[0]:
+            raise Exception("Class 0 of an alphabet must be the empty unspecified class")
+        self.index = {char: i for i, chars in enumerate(self.classes) for char in chars}
+
+    @classmethod
+    def from_charsets(cls, charsets: Iterable[FrozenSet[str]]) -> 'Alphabet':
+        """
+        The coarsest alphabet in which every one of the charsets is a union of classes.
+        """
+        membership = {}
+        for i, chars in enumerate(charsets):
+            for char in chars:
+                membership.setdefault(char, []).append(i)
+        groups = {}
+        for char, sets in membership.items():
+            groups.setdefault(tuple(sets), set()).add(char)
+        return cls([frozenset()] + sorted(map(frozenset, groups.values()), key=min))
+
+    def union(*alphabets: 'Alphabet') -> Tuple['Alphabet', List[List[int]]]:
+        """
+        The coarsest alphabet that refines all of the given ones, along with a
+        map for each of them from the new classes to their own.
+        """
+        first = alphabets[0]
+        if all(a == first for a in alphabets):
+            identity = list(range(len(first)))
+            return first, [identity] * len(alphabets)
+        groups = {}
+        for char in set().union(*(a.index for a in alphabets)):
+            groups.setdefault(tuple(a[char] for a in alphabets), set()).add(char)
+        classes = [frozenset()] + sorted(map(frozenset, groups.values()), key=min)
+        maps = [[0] + [a[min(chars)] for chars in classes[1:]] for a in alphabets]
+        return Alphabet(classes), maps
+
+    def __getitem__(self, char: str) -> int:
+        """
+        The class of a character.
+        """
+        return self.index.get(char, 0)
+
+    def __contains__(self, char: str) -> bool:
+        """
+        Whether a character is listed explicitly, rather than falling in the unspecified class.
+        """
+        return char in self.index
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Alphabet) and self.classes == other.classes
+
+    def __hash__(self) -> int:
+        return hash(self.classes)
+
+    def symbols(self, i: int) -> Set:
+        """
+        The characters in a class, or just `unspecified` for class 0.
+        """
+        return set(self.classes[i]) if i else {unspecified}
+
+    def example(self, i: int) -> str:
+        """
+        A character from a class, preferring readable ones. For class 0 it's
+        one that isn't listed anywhere in the alphabet.
+        """
+        chars = self.classes[i]
+        for char in READABLE:
+            if (char in chars) if i else (char not in self.index):
+                return char
+        if i:
+            return min(chars)
+        return next(char for char in map(chr, count(128)) if char not in self.index)
+
+    def __repr__(self) -> str:
+        return f"Alphabet({[''.join(sorted(chars)) for chars in self.classes[1:]]!r})"
+
+
 class FSM:
     """
     The finite state machine class.
     """
 
-    def __init__(self, alphabet: Set, states: Set, initial: int,
-                 accepting: Set, transition: Dict[int, Dict[Any, int]],
+    def __init__(self, alphabet: Alphabet, states: range, initial: int,
+                 accepting: Set, transition: List[array],
                  *, __validation__=True):
         if __validation__:
             """
@@ -47,39 +204,44 @@ class FSM:
             """
             if initial not in states:
                 raise Exception("Initial state not in set of all states")
-            if not accepting.issubset(states):
+            if not set(accepting).issubset(states):
                 raise Exception("Final states must be a subset of all states")
-            for state in transition.keys():
-                for symbol in transition[state]:
-                    if transition[state][symbol] not in states:
+            if len(transition) > len(states):
+                raise Exception("More transition rows than states")
+            for state, row in enumerate(transition):
+                if len(row) != len(alphabet):
+                    raise Exception(f"Transition row of {state} doesn't cover the alphabet")
+                for symbol, next_state in enumerate(row):
+                    if next_state != OBLIVION and next_state not in states:
                         raise Exception(f"Transition of {state},{symbol} "
-                                        "-> {transition[state][symbol]} "
-                                        "is invalid")
+                                        f"-> {next_state} is invalid")
 
-        self.alphabet = set(alphabet)
-        self.states = set(states)
+        self.alphabet = alphabet
+        self.states = range(len(states))
         self.initial = initial
         self.accepting = set(accepting)
-        self.transition = transition
-
-    def valid_transition(self, state: int, symbol: str) -> bool:
+        self.transition = list(transition)
+        # states without a row have no transitions at all
+        empty = array('i', [OBLIVION]) * len(alphabet)
+        while len(self.transition) < len(self.states):
+            self.transition.append(empty)
+        self._tables = None
+
+    def valid_transition(self, state: int, symbol: int) -> bool:
         """
         Checks to see if a transition is valid given the
-        current state and the symbol being read.
+        current state and the class of the symbol being read.
         """
-        return state in self.transition and symbol in self.transition[state]
+        return self.transition[state][symbol] != OBLIVION
 
     def accepts(self, string: str) -> bool:
+        index = self.alphabet.index
+        transition = self.transition
         curr_state = self.initial
-        for symbol in string:
-            if unspecified in self.alphabet and symbol not in self.alphabet:
-                symbol = unspecified
-
-            if not (curr_state in self.transition
-                    and symbol in self.transition[curr_state]):
+        for char in string:
+            curr_state = transition[curr_state][index.get(char, 0)]
+            if curr_state == OBLIVION:
                 return False
-
-            curr_state = self.transition[curr_state][symbol]
         return curr_state in self.accepting
 
     def __contains__(self, string: str) -> bool:
@@ -88,13 +250,191 @@ class FSM:
         """
         return self.accepts(string)
 
-    def reduce(self):
+    def accepts_many(self, strings: Iterable[str], vectorized=None):
+        """
+        Which of many strings this FSM accepts. With NumPy a boolean ndarray
+        comes back, otherwise a list of bools from `accepts`, which is the
+        reference the vectorized version has to agree with.
+
+        The vectorized version runs the strings through the transition table
+        together, but it pays a fixed cost per call and per step of the longest
+        string, while `accepts` stops as soon as a string can't match. On the
+        benchmark corpus `accepts` was faster at every size up to 16k strings
+        for typical triggers. For triggers that read every character,
+        like `.*hello.*`, NumPy only caught up at about 2000 strings.
+        So by default it's only used from VECTORIZE_MIN_STRINGS strings on.
+        `vectorized` forces one or the other.
+        """
+        strings = list(strings)
+        if vectorized is None:
+            vectorized = np is not None and len(strings) >= VECTORIZE_MIN_STRINGS
+        if not vectorized:
+            accepted = [self.accepts(string) for string in strings]
+            return accepted if np is None else np.array(accepted, dtype=bool)
+        return self._accepts_many_vectorized(strings)
+
+    def _numpy_tables(self):
+        """
+        The transition table as an ndarray with an extra dead state standing in
+        for OBLIVION, whether each state accepts, and the sorted code points
+        of listed characters along with their classes.
+        """
+        if self._tables is None:
+            dead = len(self.states)
+            table = np.full((dead + 1, len(self.alphabet)), dead, dtype=np.int32)
+            for state, row in enumerate(self.transition):
+                table[state] = row
+            table[table == OBLIVION] = dead
+            accepting = np.zeros(dead + 1, dtype=bool)
+            accepting[list(self.accepting)] = True
+            listed = sorted(self.alphabet.index.items(), key=lambda item: item[0])
+            code_points = np.array([ord(char) for char, _ in listed], dtype=np.uint32)
+            classes = np.array([symbol for _, symbol in listed], dtype=np.int32)
+            self._tables = table, accepting, code_points, classes
+        return self._tables
+
+    def _accepts_many_vectorized(self, strings):
+        if not strings:
+            return np.zeros(0, dtype=bool)
+        table, accepting, code_points, classes = self._numpy_tables()
+
+        # every character of every string mapped to its class, in one flat array
+        text = np.frombuffer("".join(strings).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        symbols = np.zeros(len(text), dtype=np.int32)
+        if len(code_points):
+            found = np.searchsorted(code_points, text).clip(0, len(code_points) - 1)
+            listed = code_points[found] == text
+            symbols[listed] = classes[found[listed]]
+
+        # longest strings first, so the ones still running at step t are always a prefix
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+        order = np.argsort(-lengths, kind='stable')
+        starts = (np.cumsum(lengths) - lengths)[order]
+        descending = -lengths[order]
+        states = np.full(len(strings), self.initial, dtype=np.int32)
+        dead = len(table) - 1
+        for t in range(int(-descending[0])):
+            running = np.searchsorted(descending, -t, side='left')
+            states[:running] = table[states[:running], symbols[starts[:running] + t]]
+            if (states[:running] == dead).all():
+                break
+
+        result = np.empty(len(strings), dtype=bool)
+        result[order] = accepting[states]
+        return result
+
+    def reduce(self, brzozowski=False):
+        """
+        The minimal FSM accepting the same language, found by partition
+        refinement unless Brzozowski's double reversal is asked for.
+        """
+        if brzozowski:
+            return self.brzozowski()
+        return self.hopcroft()
+
+    def brzozowski(self):
         """
         A fun result of automota theory is that reversing a FSM
         twice will result in the same automota in reduced form.
         """
         return reversed(reversed(self))
 
+    def hopcroft(self):
+        """
+        Hopcroft's partition refinement. Missing transitions go to an extra
+        dead state, and whichever block ends up holding it is dropped again,
+        so states that can't reach an accepting state disappear just like
+        they do with `brzozowski`. States are numbered in the order `crawl`
+        would find them, so both minimizations give identical tables.
+        """
+        symbols = range(len(self.alphabet))
+        dead = len(self.states)
+
+        def row(state):
+            if state == dead:
+                return (dead,) * len(self.alphabet)
+            return [dead if t == OBLIVION else t for t in self.transition[state]]
+
+        # reachable states and, per symbol, the states leading into each of them
+        reachable = [self.initial, dead]
+        seen = set(reachable)
+        inverse = [dict() for _ in symbols]
+        for state in reachable:
+            for symbol, next_state in enumerate(row(state)):
+                inverse[symbol].setdefault(next_state, []).append(state)
+                if next_state not in seen:
+                    seen.add(next_state)
+                    reachable.append(next_state)
+
+        accepting = seen & self.accepting
+        partition = [block for block in (accepting, seen - accepting) if block]
+        block_of = {state: i for i, block in enumerate(partition) for state in block}
+        work = list(range(len(partition)))
+        waiting = set(work)
+
+        while work:
+            b = work.pop()
+            waiting.discard(b)
+            splitter = partition[b]
+            for symbol in symbols:
+                leading = inverse[symbol]
+                touched = {}
+                for state in splitter:
+                    for prev in leading.get(state, ()):
+                        touched.setdefault(block_of[prev], set()).add(prev)
+                for i, inside in touched.items():
+                    block = partition[i]
+                    if len(inside) == len(block):
+                        continue
+                    outside = block - inside
+                    partition[i] = inside
+                    partition.append(outside)
+                    new = len(partition) - 1
+                    for state in outside:
+                        block_of[state] = new
+                    if i in waiting or len(outside) <= len(inside):
+                        work.append(new)
+                        waiting.add(new)
+                    else:
+                        work.append(i)
+                        waiting.add(i)
+
+        dead_block = block_of[dead]
+        start = block_of[self.initial]
+        if start == dead_block:
+            return FSM(
+                alphabet=self.alphabet,
+                states=range(1),
+                initial=0,
+                accepting=set(),
+                transition=[],
+                __validation__=False
+            )
+
+        number = {start: 0}
+        order = [start]
+        transition = []
+        for block in order:
+            new_row = array('i', [OBLIVION]) * len(self.alphabet)
+            for symbol, next_state in enumerate(row(next(iter(partition[block])))):
+                target = block_of[next_state]
+                if target == dead_block:
+                    continue
+                if target not in number:
+                    number[target] = len(order)
+                    order.append(target)
+                new_row[symbol] = number[target]
+            transition.append(new_row)
+
+        return FSM(
+            alphabet=self.alphabet,
+            states=range(len(order)),
+            initial=0,
+            accepting={number[block] for block in order if next(iter(partition[block])) in self.accepting},
+            transition=transition,
+            __validation__=False
+        )
+
     def __repr__(self) -> str:
         representation = []
         representation.append("FSM:\n")
@@ -103,7 +443,7 @@ class FSM:
         representation.append(f"\tInitial State: {repr(self.initial)}\n")
         representation.append(f"\tAccepting States: {repr(self.accepting)}\n")
         representation.append(f"\tTransition Function: "
-                              f"{repr(self.transition)}\n")
+                              f"{repr([list(row) for row in self.transition])}\n")
         return "".join(representation)
 
     def __str__(self) -> str:
@@ -111,10 +451,8 @@ class FSM:
 
         # top row
         row = ["", "name", "accepting?"]
-        whitespace = set(['\n', '\t', ' ', '\r', '\f'])
-        row.extend(str(symbol) if symbol not in whitespace else
-                   repr(symbol)[1:-1] for symbol in
-                   self.alphabet)
+        row.append(str(unspecified))
+        row.extend(repr("".join(sorted(chars)))[1:-1] for chars in self.alphabet.classes[1:])
         rows.append(row)
 
         # other rows
@@ -129,12 +467,8 @@ class FSM:
                 row.append("True")
             else:
                 row.append("False")
-            for symbol in self.alphabet:
-                if (state in self.transition
-                        and symbol in self.transition[state]):
-                    row.append(str(self.transition[state][symbol]))
-                else:
-                    row.append("")
+            for next_state in self.transition[state]:
+                row.append(str(next_state) if next_state != OBLIVION else "")
             rows.append(row)
 
         # column widths
@@ -160,8 +494,8 @@ class FSM:
         be concatenated.
         """
         if len(fsms) == 0:
-            return epsilon({})
-        alphabet = set().union(*[fsm.alphabet for fsm in fsms])
+            return epsilon(Alphabet([frozenset()]))
+        alphabet, maps = Alphabet.union(*[fsm.alphabet for fsm in fsms])
         last_index, last = len(fsms) - 1, fsms[-1]
 
         def connect_all(i, substate):
@@ -189,10 +523,9 @@ class FSM:
         def follow(current, symbol):
             next_states = set()
             for (i, substate) in current:
-                fsm = fsms[i]
-                if fsm.valid_transition(substate, symbol):
-                    next_states.update(
-                        connect_all(i, fsm.transition[substate][symbol]))
+                next_state = fsms[i].transition[substate][maps[i][symbol]]
+                if next_state != OBLIVION:
+                    next_states.update(connect_all(i, next_state))
             if not next_states:
                 raise OblivionError
             return frozenset(next_states)
@@ -210,6 +543,7 @@ class FSM:
         """
         alphabet = self.alphabet
         initial = {self.initial}
+        initial_row = self.transition[self.initial]
 
         def follow(state, symbol):
             next_states = set()
@@ -218,8 +552,8 @@ class FSM:
                     next_states.add(self.transition[substate][symbol])
 
                 if (substate in self.accepting
-                        and symbol in self.transition[self.initial]):
-                    next_states.add(self.transition[self.initial][symbol])
+                        and initial_row[symbol] != OBLIVION):
+                    next_states.add(initial_row[symbol])
 
             if len(next_states) == 0:
                 raise OblivionError
@@ -231,8 +565,9 @@ class FSM:
 
         base = crawl(alphabet, initial, accepts, follow)
         num_states = len(base.states)
+        base.states = range(num_states + 1)
         base.accepting.add(num_states)
-        base.transition[num_states] = base.transition[base.initial]
+        base.transition.append(base.transition[base.initial])
         base.initial = num_states
         return base
 
@@ -305,8 +640,7 @@ class FSM:
 
         def follow(current, symbol):
             next_states = dict()
-            if (0 in current and current[0] in self.transition
-                    and symbol in self.transition[current[0]]):
+            if 0 in current and self.valid_transition(current[0], symbol):
                 next_states[0] = self.transition[current[0]][symbol]
             return next_states
 
@@ -319,13 +653,18 @@ class FSM:
         alphabet = self.alphabet
         initial = frozenset(self.accepting)
 
+        # (state, symbol) -> the states with a transition to state on symbol
+        predecessors = {}
+        for prev, row in enumerate(self.transition):
+            for symbol, state in enumerate(row):
+                if state != OBLIVION:
+                    predecessors.setdefault((state, symbol), []).append(prev)
+
         def follow(current, symbol):
             next_states = frozenset([
                 prev
-                for prev in self.transition
                 for state in current
-                if symbol in self.transition[prev]
-                and self.transition[prev][symbol] == state
+                for prev in predecessors.get((state, symbol), ())
             ])
             if len(next_states) == 0:
                 raise OblivionError
@@ -350,12 +689,10 @@ class FSM:
             current = reachable[i]
             if current in self.accepting:
                 return True
-            if current in self.transition:
-                for symbol in self.transition[current]:
-                    next_state = self.transition[current][symbol]
-                    if next_state not in seen:
-                        reachable.append(next_state)
-                        seen.add(next_state)
+            for next_state in self.transition[current]:
+                if next_state != OBLIVION and next_state not in seen:
+                    reachable.append(next_state)
+                    seen.add(next_state)
             i += 1
         return False
 
@@ -365,14 +702,147 @@ class FSM:
         """
         return not self.islive(self.initial)
 
+    def live_states(self):
+        """
+        All of the states that are reachable from the initial state and
+        from which an accepting state can be reached.
+        """
+        reachable = {self.initial}
+        queue = [self.initial]
+        predecessors = {}
+        while queue:
+            current = queue.pop()
+            for next_state in self.transition[current]:
+                if next_state == OBLIVION:
+                    continue
+                predecessors.setdefault(next_state, set()).add(current)
+                if next_state not in reachable:
+                    reachable.add(next_state)
+                    queue.append(next_state)
+
+        live = {state for state in self.accepting if state in reachable}
+        queue = list(live)
+        while queue:
+            current = queue.pop()
+            for prev in predecessors.get(current, ()):
+                if prev not in live:
+                    live.add(prev)
+                    queue.append(prev)
+        return live
+
+    def _live_transitions(self, live, state):
+        return [(symbol, next_state)
+                for symbol, next_state in enumerate(self.transition[state])
+                if next_state in live]
+
+    def first_symbols(self):
+        """
+        The symbols that can start a non-empty accepted string, with
+        `unspecified` standing in for every character the alphabet doesn't list.
+        """
+        live = self.live_states()
+        if self.initial not in live:
+            return set()
+        return set().union(*(self.alphabet.symbols(symbol)
+                             for symbol, _ in self._live_transitions(live, self.initial)))
+
+    def length_bounds(self):
+        """
+        The lengths of the shortest and longest accepted strings. The
+        longest is None if it is unbounded and both are None if the FSM is empty.
+        """
+        live = self.live_states()
+        if self.initial not in live:
+            return None, None
+        edges = {state: [n for _, n in self._live_transitions(live, state)] for state in live}
+
+        shortest = None
+        depth = {self.initial: 0}
+        queue = [self.initial]
+        for current in queue:
+            if current in self.accepting:
+                shortest = depth[current]
+                break
+            for next_state in edges[current]:
+                if next_state not in depth:
+                    depth[next_state] = depth[current] + 1
+                    queue.append(next_state)
+
+        # longest path by depth first search, any cycle among live states makes it unbounded
+        longest = {}
+        on_stack = set()
+        stack = [(self.initial, iter(edges[self.initial]))]
+        on_stack.add(self.initial)
+        while stack:
+            state, children = stack[-1]
+            for next_state in children:
+                if next_state in on_stack:
+                    return shortest, None
+                if next_state not in longest:
+                    on_stack.add(next_state)
+                    stack.append((next_state, iter(edges[next_state])))
+                    break
+            else:
+                stack.pop()
+                on_stack.discard(state)
+                best = 0 if state in self.accepting else None
+                for next_state in edges[state]:
+                    if longest[next_state] is not None and (best is None or longest[next_state] + 1 > best):
+                        best = longest[next_state] + 1
+                longest[state] = best
+        return shortest, longest[self.initial]
+
+    def single_string(self):
+        """
+        If this FSM accepts exactly one string, return it. Otherwise return None.
+        """
+        live = self.live_states()
+        state = self.initial
+        if state not in live:
+            return None
+        symbols = []
+        seen = set()
+        while True:
+            if state in seen:
+                return None
+            seen.add(state)
+            transitions = self._live_transitions(live, state)
+            if state in self.accepting:
+                return "".join(symbols) if not transitions else None
+            if len(transitions) != 1:
+                return None
+            symbol, state = transitions[0]
+            chars = self.alphabet.classes[symbol]
+            if len(chars) != 1:
+                return None
+            symbols.extend(chars)
+
     def __iter__(self):
         return self.strings()
 
+    def shared_string(self, other):
+        """
+        The shortest string accepted by both FSMs, or None if they're disjoint.
+        """
+        return search((self, other), all, required=(0, 1))
+
+    def difference_string(self, other):
+        """
+        The shortest string this FSM accepts and the other doesn't, or None if it's a subset.
+        """
+        return search((self, other), lambda accepts: accepts[0] and not accepts[1], required=(0,))
+
+    def distinguishing_string(self, other):
+        """
+        The shortest string only one of the FSMs accepts, or None if they're equivalent.
+        """
+        return search((self, other), lambda accepts: accepts[0] != accepts[1])
+
     def equivalent(self, other):
         """
         Two regexes are the same if their symmetric difference is empty.
         """
-        return (self ^ other).empty()
+        return self.distinguishing_string(other) is None
 
     def __eq__(self, other):
         return self.equivalent(other)
@@ -381,7 +851,7 @@ class FSM:
         """
         FSMs are different if their symmetric difference is non empty.
         """
-        return not (self ^ other).empty()
+        return self.distinguishing_string(other) is not None
 
     def __ne__(self, other):
         return self.different(other)
@@ -394,10 +864,10 @@ class FSM:
         return self.difference(other)
 
     def isdisjoint(self, other):
-        return (self & other).empty()
+        return self.shared_string(other) is None
 
     def issubset(self, other):
-        return (self - other).empty()
+        return self.difference_string(other) is None
 
     def __le__(self, other):
         return self.issubset(other)
@@ -409,7 +879,7 @@ class FSM:
         return self.ispropersubset(other)
 
     def issuperset(self, other):
-        return (other - self).empty()
+        return other.issubset(self)
 
     def __ge__(self, other):
         return self.issuperset(other)
@@ -421,29 +891,20 @@ class FSM:
         return self.ispropersuperset(other)
 
     def derive(self, string):
-        try:
-            state = self.initial
-            for symbol in string:
-                if symbol not in self.alphabet:
-                    if unspecified not in self.alphabet:
-                        raise KeyError(symbol)
-                    symbol = unspecified
-
-                if not self.valid_transition(state, symbol):
-                    raise OblivionError
-
-                state = self.transition[state][symbol]
-
-            return FSM(
-                alphabet=self.alphabet,
-                states=self.states,
-                initial=state,
-                accepting=self.accepting,
-                transition=self.transition,
-                __validation__=False
-            )
-        except OblivionError:
-            return null(self.alphabet)
+        state = self.initial
+        for char in string:
+            state = self.transition[state][self.alphabet[char]]
+            if state == OBLIVION:
+                return null(self.alphabet)
+
+        return FSM(
+            alphabet=self.alphabet,
+            states=self.states,
+            initial=state,
+            accepting=self.accepting,
+            transition=self.transition,
+            __validation__=False
+        )
 
 
 def null(alphabet):
@@ -452,12 +913,10 @@ def null(alphabet):
     """
     return FSM(
         alphabet=alphabet,
-        states={0},
+        states=range(1),
         initial=0,
         accepting=set(),
-        transition={
-            0: dict([(symbol, 0) for symbol in alphabet]),
-        },
+        transition=[array('i', [0]) * len(alphabet)],
         __validation__=False
     )
 
@@ -468,10 +927,10 @@ def epsilon(alphabet):
     """
     return FSM(
         alphabet=alphabet,
-        states={0},
+        states=range(1),
         initial=0,
         accepting={0},
-        transition={},
+        transition=[],
         __validation__=False
     )
 
@@ -480,19 +939,16 @@ def parallel(fsms, test):
     """
     Crawl several FSMs in parallel to create new FSM.
     """
-    alphabet = set().union(*[fsm.alphabet for fsm in fsms])
+    alphabet, maps = Alphabet.union(*[fsm.alphabet for fsm in fsms])
     initial = {i: fsm.initial for (i, fsm) in enumerate(fsms)}
 
-    def follow(current, symbol, fsm_range=tuple(enumerate(fsms))):
+    def follow(current, symbol, fsm_range=tuple(enumerate(zip(fsms, maps)))):
         next_states = dict()
-        for i, f in fsm_range:
-            if symbol not in f.alphabet and unspecified in f.alphabet:
-                actual_symbol = unspecified
-            else:
-                actual_symbol = symbol
-            if (i in current and current[i] in f.transition
-                    and actual_symbol in f.transition[current[i]]):
-                next_states[i] = f.transition[current[i]][actual_symbol]
+        for i, (f, symbol_map) in fsm_range:
+            if i in current:
+                next_state = f.transition[current[i]][symbol_map[symbol]]
+                if next_state != OBLIVION:
+                    next_states[i] = next_state
         if not next_states:
             raise OblivionError
         return next_states
@@ -505,35 +961,107 @@ def parallel(fsms, test):
     return crawl(alphabet, initial, accepts, follow)
 
 
-def crawl(alphabet, initial, accepts, follow):
+def search(fsms, test, required=()):
+    """
+    Breadth first search through the product of several FSMs, without
+    building it, for the shortest string whose list of which FSMs accept it
+    passes `test`. Returns None if there's no such string.
+
+    An FSM drops out once it can't reach an accepting state any more. Paths
+    where one of the `required` FSMs has dropped out, or all of them have,
+    are never followed.
+    """
+    alphabet, maps = Alphabet.union(*[fsm.alphabet for fsm in fsms])
+    live = [fsm.live_states() for fsm in fsms]
+    symbols = range(len(alphabet))
+
+    def settle(state):
+        return tuple(substate if substate in alive else OBLIVION for substate, alive in zip(state, live))
+
+    def viable(state):
+        return (all(state[i] != OBLIVION for i in required)
+                and any(substate != OBLIVION for substate in state))
+
+    start = settle(tuple(fsm.initial for fsm in fsms))
+    if not viable(start):
+        return None
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if test([substate in fsm.accepting for substate, fsm in zip(state, fsms)]):
+            path = []
+            while parents[state] is not None:
+                state, symbol = parents[state]
+                path.append(alphabet.example(symbol))
+            return "".join(reversed(path))
+        for symbol in symbols:
+            next_state = settle(tuple(
+                fsm.transition[substate][symbol_map[symbol]] if substate != OBLIVION else OBLIVION
+                for substate, fsm, symbol_map in zip(state, fsms, maps)))
+            if next_state not in parents and viable(next_state):
+                parents[next_state] = (state, symbol)
+                queue.append(next_state)
+    return None
+
+
+def state_key(state):
+    """
+    A hashable key for a state reached during `crawl`, equal for states that compare equal.
+    `parallel` and `everythingbut` use dicts as states and some initial states are plain sets.
+    """
+    if isinstance(state, dict):
+        return tuple(sorted(state.items()))
+    if isinstance(state, set):
+        return frozenset(state)
+    return state
+
+
+def crawl(alphabet: Alphabet, initial, accepts: Callable, follow: Callable) -> FSM:
     """
     Create a new FSM from the above conditions.
     """
 
+    active = _active_budget.get()
+    if active is not None:
+        budget, deadline = active
+        if budget.max_alphabet is not None and len(alphabet) > budget.max_alphabet:
+            raise BudgetExceeded('alphabet', budget.max_alphabet)
+
     states = [initial]
+    index: Dict = {state_key(initial): 0}
     accepting = set()
-    transition = dict()
+    transition = []
+    symbols = range(len(alphabet))
+    blank = array('i', [OBLIVION]) * len(alphabet)
 
     i = 0
     while i < len(states):
         state = states[i]
 
+        if active is not None:
+            if budget.max_states is not None and len(states) > budget.max_states:
+                raise BudgetExceeded('states', budget.max_states)
+            if deadline is not None and monotonic() > deadline:
+                raise BudgetExceeded('deadline', budget.seconds)
+
         if accepts(state):
             accepting.add(i)
 
-        transition[i] = dict()
-        for symbol in alphabet:
+        row = array('i', blank)
+        for symbol in symbols:
             try:
                 next_states = follow(state, symbol)
             except OblivionError:
                 continue
             else:
-                try:
-                    j = states.index(next_states)
-                except ValueError:
-                    j = len(states)
+                key = state_key(next_states)
+                j = index.get(key)
+                if j is None:
+                    j = index[key] = len(states)
                     states.append(next_states)
-                transition[i][symbol] = j
+                row[symbol] = j
+        transition.append(row)
 
         i += 1
 
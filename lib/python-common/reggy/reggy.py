@@ -1,6 +1,8 @@
 from lib.reggy import fsm
 # import fsm
+from array import array
 from functools import reduce
+import hashlib
 import json
 import re2 as re
 
@@ -11,10 +13,72 @@ class NotParseable(Exception):
         self.position = position
 
 
-class ABCReggy:
+class TooComplex(NotParseable):
+    """
+    Compiling the regex went over its fsm.Budget. `reason` is the limit that
+    was hit, one of 'states', 'alphabet' or 'deadline'.
+    """
+
+    reasons = {
+        'states': "it needs more than {} states",
+        'alphabet': "it tells apart more than {} kinds of characters",
+        'deadline': "it took longer than {} seconds to compile",
+    }
+
+    def __init__(self, reason, limit):
+        super().__init__(self.reasons[reason].format(limit), None)
+        self.reason = reason
+        self.limit = limit
+
+
+# how many distinct values of each kind of leaf are shared at most
+INTERN_LIMIT = 4096
+
+
+def _interned(table, key, make):
+    """
+    The shared node for `key` in `table`, made with `make` the first time it's asked for.
+    """
+    node = table.get(key)
+    if node is None:
+        node = make()
+        if len(table) < INTERN_LIMIT:
+            table[key] = node
+    return node
+
+
+class Frozen:
+    """
+    Base class for the parts of a parsed regex. They are immutable once built so
+    that equal leaves can be shared between every expression that uses them.
+    """
+    __slots__ = ()
+
+    def _init(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), self.__getnewargs__()
+
+    def __getnewargs__(self):
+        raise NotImplementedError
+
+    def copy(self):
+        return self
+
+
+class ABCReggy(Frozen):
     """
     Abstract base class for all of the regex stuff.
     """
+    __slots__ = ()
 
     def to_fsm(self, alphabet):
         """
@@ -49,23 +113,27 @@ class ABCReggy:
         return self.__repr__()
 
 
-class Bound:
+class Bound(Frozen):
     """
     Represents a bound in a regular expression.
     Such as one of the numbers in {3,10}.
     Can possibly be infinite (None).
     """
+    __slots__ = ('bound', 'infinite')
+    _shared = {}
 
-    def __init__(self, b):
-        if b is None:
-            self.bound = b
-            self.infinite = True
-            return
-        if b < 0:
+    def __new__(cls, b):
+        if b is not None and b < 0:
             raise Exception(f"Invalid bound: {b}")
-        else:
-            self.bound = b
-            self.infinite = False
+
+        def make():
+            bound = object.__new__(cls)
+            bound._init(bound=b, infinite=b is None)
+            return bound
+        return _interned(cls._shared, b, make)
+
+    def __getnewargs__(self):
+        return (self.bound,)
 
     def __repr__(self):
         if self.infinite:
@@ -136,13 +204,13 @@ class Bound:
             return Bound(0)
         if self.infinite or other.infinite:
             return Bound(None)
-        return Bound(self.bound, other.bound)
+        return Bound(self.bound * other.bound)
 
     def __add__(self, other):
         assert isinstance(other, Bound)
         if self.infinite or other.infinite:
             return Bound(None)
-        return Bound(self.bound, other.bound)
+        return Bound(self.bound + other.bound)
 
     def __sub__(self, other):
         """
@@ -157,25 +225,28 @@ class Bound:
             return self
         return Bound(self.bound - other.bound)
 
-    def copy(self):
-        return Bound(self.bound)
-
 
-class Multiplier:
+class Multiplier(Frozen):
     """
     A set of bounds such as the entirety of {3,10}.
     """
+    __slots__ = ('minimum', 'maximum', 'mandatory', 'optional')
+    _shared = {}
 
-    def __init__(self, minimum, maximum):
+    def __new__(cls, minimum, maximum):
         if minimum.infinite:
             raise Exception("Minimum bound can't be infinite")
         if minimum > maximum:
             raise Exception("Min can't be larger than max")
 
-        self.minimum = minimum
-        self.maximum = maximum
-        self.mandatory = self.minimum
-        self.optional = self.maximum - self.minimum
+        def make():
+            multiplier = object.__new__(cls)
+            multiplier._init(minimum=minimum, maximum=maximum, mandatory=minimum, optional=maximum - minimum)
+            return multiplier
+        return _interned(cls._shared, (minimum.bound, maximum.bound), make)
+
+    def __getnewargs__(self):
+        return self.minimum, self.maximum
 
     def __eq__(self, other):
         if not isinstance(other, Multiplier):
@@ -311,9 +382,6 @@ class Multiplier:
         optional = min(self.optional, other.optional)
         return Multiplier(mandatory, mandatory + optional)
 
-    def copy(self):
-        return Multiplier(self.minimum.copy(), self.maximum.copy())
-
 
 zero = Multiplier(Bound(0), Bound(0))
 qm = Multiplier(Bound(0), Bound(1))
@@ -326,9 +394,13 @@ class Conc(ABCReggy):
     """
     Concatenation of Mults.
     """
+    __slots__ = ('mults',)
 
     def __init__(self, *mults):
-        self.mults = tuple(mults)
+        self._init(mults=tuple(mults))
+
+    def __getnewargs__(self):
+        return self.mults
 
     def __eq__(self, other):
         if not isinstance(other, Conc):
@@ -373,7 +445,10 @@ class Conc(ABCReggy):
         return fsm1
 
     def alphabet(self):
-        return {fsm.unspecified}.union(*[m.alphabet() for m in self.mults])
+        return fsm.Alphabet.from_charsets(self.charsets())
+
+    def charsets(self):
+        return set().union(*[m.charsets() for m in self.mults])
 
     def empty(self):
         for m in self.mults:
@@ -405,16 +480,19 @@ class Mult(ABCReggy):
     """
     Combination of character matching and a multiplier.
     """
+    __slots__ = ('multiplicand', 'multiplier')
 
     def __init__(self, multiplicand, multiplier):
-        self.multiplicand = multiplicand
-        self.multiplier = multiplier
+        self._init(multiplicand=multiplicand, multiplier=multiplier)
+
+    def __getnewargs__(self):
+        return self.multiplicand, self.multiplier
 
     def __eq__(self, other):
         if not isinstance(other, Mult):
             return False
         return (self.multiplicand == other.multiplicand
-                and other.multiplier == other.multiplier)
+                and self.multiplier == other.multiplier)
 
     def __hash__(self):
         return hash((self.multiplicand, self.multiplier))
@@ -500,11 +578,11 @@ class Mult(ABCReggy):
     def reversed(self):
         return Mult(reversed(self.multiplicand), self.multiplier)
 
-    def copy(self):
-        return Mult(self.multiplicand.copy(), self.muliplier.copy())
-
     def alphabet(self):
-        return {fsm.unspecified} | self.multiplicand.alphabet()
+        return fsm.Alphabet.from_charsets(self.charsets())
+
+    def charsets(self):
+        return self.multiplicand.charsets()
 
 
 class CharacterClass(ABCReggy):
@@ -512,14 +590,23 @@ class CharacterClass(ABCReggy):
     A frozenset of symbols. Used to represent the various regular expression
     character classes.
     """
+    __slots__ = ('chars', 'negated')
+    _shared = {}
 
-    def __init__(self, chars=set(), negated=False):
-        self.chars = frozenset(chars)
-        self.negated = negated
-
-        if fsm.unspecified in self.chars:
+    def __new__(cls, chars=frozenset(), negated=False):
+        chars = frozenset(chars)
+        if fsm.unspecified in chars:
             raise Exception("Can't have unspecified in charclass.")
 
+        def make():
+            cc = object.__new__(cls)
+            cc._init(chars=chars, negated=negated)
+            return cc
+        return _interned(cls._shared, (chars, negated), make)
+
+    def __getnewargs__(self):
+        return self.chars, self.negated
+
     def __eq__(self, other):
         if isinstance(other, CharacterClass):
             return self.chars == other.chars and self.negated == other.negated
@@ -577,28 +664,28 @@ class CharacterClass(ABCReggy):
         if alphabet is None:
             alphabet = self.alphabet()
 
-        if self.negated:
-            transition = {
-                0: dict([(symbol, 1) for symbol in (alphabet - self.chars)])
-            }
-        else:
-            transition = {
-                0: dict([(symbol, 1) for symbol in self.chars])
-            }
+        # the alphabet refines self.chars, so each class is either all in it or all out of it
+        row = array('i', [fsm.OBLIVION]) * len(alphabet)
+        for symbol, chars in enumerate(alphabet.classes):
+            if chars.isdisjoint(self.chars) == self.negated:
+                row[symbol] = 1
 
         return fsm.FSM(
             alphabet=alphabet,
-            states={0, 1},
+            states=range(2),
             initial=0,
             accepting={1},
-            transition=transition
+            transition=[row]
         )
 
     def concatenate(self, other):
         return Mult(self, one) + other
 
     def alphabet(self):
-        return {fsm.unspecified} | self.chars
+        return fsm.Alphabet.from_charsets(self.charsets())
+
+    def charsets(self):
+        return {self.chars}
 
     def empty(self):
         return len(self.chars) == 0 and not self.negated
@@ -622,8 +709,8 @@ class CharacterClass(ABCReggy):
             return '-', i + 1
         elif string[i] == '-' and string[i + 1] == ']':
             return '-', i + 1
-        elif string[i] == '-' and i - 1 == start:
-            return '0', i + 1
+        elif string[i] == '-' and i == start:
+            return '-', i + 1
         elif string[i] == '-':
             s = ord(string[i - 1]) + 1
             e = ord(string[i + 1]) + 1
@@ -649,9 +736,11 @@ class CharacterClass(ABCReggy):
             negated = True
             i += 1
 
+        # a '-' right after the opening bracket (or '^') is a literal
+        first = i
         chars = []
         while i < end:
-            c, i = CharacterClass.match_unit(string, i, True, start)
+            c, i = CharacterClass.match_unit(string, i, True, first)
             chars.append(c)
 
         if None in chars:
@@ -660,8 +749,7 @@ class CharacterClass(ABCReggy):
                     map(lambda x: x if isinstance(x, CharacterClass)
                         else CharacterClass(x), chars),
                     CharacterClass())
-        cc.negated = negated
-        return cc, end + 1
+        return CharacterClass(cc.chars, negated), end + 1
 
     @classmethod
     def match(cls, string, i=0):
@@ -720,9 +808,6 @@ class CharacterClass(ABCReggy):
     def reversed(self):
         return self
 
-    def copy(self):
-        return CharacterClass(self.chars.copy(), negated=self.negated)
-
 
 nothing = CharacterClass()
 w = CharacterClass("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_"
@@ -754,12 +839,16 @@ escapes = {
 
 
 class Pattern(ABCReggy):
+    __slots__ = ('concs',)
 
     def __init__(self, *concs):
         if all([c is None for c in concs]):
-            self.concs = frozenset()
+            self._init(concs=frozenset())
         else:
-            self.concs = frozenset(concs)
+            self._init(concs=frozenset(concs))
+
+    def __getnewargs__(self):
+        return tuple(self.concs)
 
     def __eq__(self, other):
         if not isinstance(other, Pattern):
@@ -784,7 +873,10 @@ class Pattern(ABCReggy):
         return Mult(self, one) + other
 
     def alphabet(self):
-        return {fsm.unspecified}.union(*[c.alphabet() for c in self.concs])
+        return fsm.Alphabet.from_charsets(self.charsets())
+
+    def charsets(self):
+        return set().union(*[c.charsets() for c in self.concs])
 
     def empty(self):
         for c in self.concs:
@@ -793,7 +885,7 @@ class Pattern(ABCReggy):
         return True
 
     def intersection(self, other):
-        alphabet = self.alphabet() | other.alphabet()
+        alphabet = fsm.Alphabet.from_charsets(self.charsets() | other.charsets())
         return self.to_fsm(alphabet) & other.to_fsm(alphabet)
 
     def union(self, other):
@@ -848,17 +940,16 @@ class Pattern(ABCReggy):
         return self.to_fsm().equivalent(other.to_fsm())
 
 
-def serialize(obj):
-    if isinstance(obj, fsm.UnspecifiedCharacter):
-        return obj.__dict__
+# bump whenever the layout produced by Reggy.to_json or the automata it describes change
+# so stored automata get rebuilt (3: bracket ranges like [a-z] used to parse wrong)
+FSM_FORMAT_VERSION = 3
 
-    raise TypeError
 
-
-def as_unspecified(dct):
-    if "__unspecified__" in dct:
-        return fsm.unspecified
-    return dct
+def regex_hash(regex):
+    """
+    Fingerprint of a regex, stored next to its serialized FSM to detect stale entries.
+    """
+    return hashlib.sha1(regex.encode()).hexdigest()
 
 
 class Reggy():
@@ -866,18 +957,20 @@ class Reggy():
     Actual regex class that will use the reggy backend.
     """
 
-    def __init__(self, regex, rep=None):
+    def __init__(self, regex, rep=None, budget=None):
         if rep is not None:
+            alphabet = fsm.Alphabet([frozenset()] + [frozenset(chars) for chars in rep['classes']])
+            transition = [array('i', row) for row in rep['transition']]
             self.re = rep['re']
             self.fsm = fsm.FSM(
-                rep['alphabet'],
-                rep['states'],
+                alphabet,
+                range(len(transition)),
                 rep['initial'],
-                rep['accepting'],
-                rep['transition'],
+                set(rep['accepting']),
+                transition,
                 __validation__=False
             )
-            self.pattern = re.compile(self.re)
+            self.pattern = re.compile(f"(?i){self.re}")
             return
         double_brackets = regex.find("[[")
         if double_brackets != -1:
@@ -892,7 +985,11 @@ class Reggy():
             raise NotParseable("Reggy does not support named capture groups.",
                                named + 1)
         self.re = regex
-        self.fsm = Pattern.parse(self.re).to_fsm().reduce()
+        try:
+            with fsm.limited(budget):
+                self.fsm = Pattern.parse(self.re).to_fsm().reduce()
+        except fsm.BudgetExceeded as e:
+            raise TooComplex(e.reason, e.limit) from None
         self.pattern = re.compile(f"(?i){self.re}")
 
     def __str__(self):
@@ -915,17 +1012,32 @@ class Reggy():
             raise TypeError
         return self.fsm.isdisjoint(other.fsm)
 
+    def overlap_example(self, other):
+        """
+        The shortest string both regexes' FSMs accept, or None if they're disjoint.
+        """
+        if not isinstance(other, Reggy):
+            raise TypeError
+        return self.fsm.shared_string(other.fsm)
+
     def to_json(self):
+        """
+        Serialize the compiled FSM. Each character class after the unspecified
+        one is written as a string and each state as its row of next states,
+        with -1 where there is no transition.
+        """
         return json.dumps({
+            'version': FSM_FORMAT_VERSION,
             're': self.re,
-            'alphabet': list(self.fsm.alphabet),
-            'states': list(self.fsm.states),
+            'classes': ["".join(sorted(chars)) for chars in self.fsm.alphabet.classes[1:]],
             'initial': self.fsm.initial,
-            'accepting': list(self.fsm.accepting),
-            'transition': self.fsm.transition
-        }, default=serialize)
+            'accepting': sorted(self.fsm.accepting),
+            'transition': [row.tolist() for row in self.fsm.transition]
+        }, separators=(',', ':'))
 
     @classmethod
     def from_json(cls, data):
-        rep = json.loads(data, object_hook=as_unspecified)
+        rep = json.loads(data)
+        if rep.get('version') != FSM_FORMAT_VERSION:
+            raise ValueError(f"Unsupported FSM format version: {rep.get('version')}")
         return cls("", rep)
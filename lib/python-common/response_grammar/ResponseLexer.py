@@ -1,130 +0,0 @@
-# Generated from Response.g4 by ANTLR 4.7.2
-from antlr4 import *
-from io import StringIO
-from typing.io import TextIO
-import sys
-
-
-
-def serializedATN():
-    with StringIO() as buf:
-        buf.write("\3\u608b\ua72a\u8133\ub9ed\u417c\u3be7\u7786\u5964\2\20")
-        buf.write("\u00c0\b\1\4\2\t\2\4\3\t\3\4\4\t\4\4\5\t\5\4\6\t\6\4\7")
-        buf.write("\t\7\4\b\t\b\4\t\t\t\4\n\t\n\4\13\t\13\4\f\t\f\4\r\t\r")
-        buf.write("\4\16\t\16\4\17\t\17\3\2\3\2\3\3\3\3\3\4\3\4\3\5\6\5\'")
-        buf.write("\n\5\r\5\16\5(\3\6\3\6\3\6\3\6\5\6/\n\6\3\6\3\6\6\6\63")
-        buf.write("\n\6\r\6\16\6\64\3\6\3\6\6\69\n\6\r\6\16\6:\3\6\3\6\3")
-        buf.write("\6\3\7\3\7\3\7\3\7\3\7\3\7\3\7\3\7\3\7\3\7\3\7\3\7\5\7")
-        buf.write("L\n\7\3\b\3\b\3\b\3\b\3\b\3\b\3\b\3\b\3\b\3\b\5\bX\n\b")
-        buf.write("\3\t\3\t\3\t\3\t\3\t\3\t\3\t\3\t\3\t\3\t\5\td\n\t\3\n")
-        buf.write("\3\n\3\n\3\n\3\n\3\n\3\n\3\n\3\n\3\n\5\np\n\n\3\13\3\13")
-        buf.write("\3\13\3\13\3\13\3\13\3\13\3\13\3\13\3\13\3\13\3\13\3\13")
-        buf.write("\3\13\5\13\u0080\n\13\3\f\3\f\3\f\3\f\3\f\3\f\3\f\3\f")
-        buf.write("\3\f\3\f\3\f\3\f\3\f\3\f\3\f\3\f\5\f\u0092\n\f\3\r\3\r")
-        buf.write("\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3\r\3")
-        buf.write("\r\5\r\u00a4\n\r\3\16\3\16\3\16\3\16\3\16\3\16\3\16\3")
-        buf.write("\16\3\16\3\16\3\16\3\16\3\16\3\16\3\16\3\16\3\16\3\16")
-        buf.write("\5\16\u00b8\n\16\3\17\6\17\u00bb\n\17\r\17\16\17\u00bc")
-        buf.write("\3\17\3\17\2\2\20\3\3\5\4\7\5\t\6\13\7\r\b\17\t\21\n\23")
-        buf.write("\13\25\f\27\r\31\16\33\17\35\20\3\2\5\5\2\62;C\\c|\3\2")
-        buf.write("\62;\5\2\13\f\17\17\"\"\2\u00cc\2\3\3\2\2\2\2\5\3\2\2")
-        buf.write("\2\2\7\3\2\2\2\2\t\3\2\2\2\2\13\3\2\2\2\2\r\3\2\2\2\2")
-        buf.write("\17\3\2\2\2\2\21\3\2\2\2\2\23\3\2\2\2\2\25\3\2\2\2\2\27")
-        buf.write("\3\2\2\2\2\31\3\2\2\2\2\33\3\2\2\2\2\35\3\2\2\2\3\37\3")
-        buf.write("\2\2\2\5!\3\2\2\2\7#\3\2\2\2\t&\3\2\2\2\13*\3\2\2\2\r")
-        buf.write("K\3\2\2\2\17W\3\2\2\2\21c\3\2\2\2\23o\3\2\2\2\25\177\3")
-        buf.write("\2\2\2\27\u0091\3\2\2\2\31\u00a3\3\2\2\2\33\u00b7\3\2")
-        buf.write("\2\2\35\u00ba\3\2\2\2\37 \7]\2\2 \4\3\2\2\2!\"\7_\2\2")
-        buf.write("\"\6\3\2\2\2#$\7.\2\2$\b\3\2\2\2%\'\t\2\2\2&%\3\2\2\2")
-        buf.write("\'(\3\2\2\2(&\3\2\2\2()\3\2\2\2)\n\3\2\2\2*+\7]\2\2+,")
-        buf.write("\7>\2\2,.\3\2\2\2-/\7c\2\2.-\3\2\2\2./\3\2\2\2/\60\3\2")
-        buf.write("\2\2\60\62\7<\2\2\61\63\t\2\2\2\62\61\3\2\2\2\63\64\3")
-        buf.write("\2\2\2\64\62\3\2\2\2\64\65\3\2\2\2\65\66\3\2\2\2\668\7")
-        buf.write("<\2\2\679\t\3\2\28\67\3\2\2\29:\3\2\2\2:8\3\2\2\2:;\3")
-        buf.write("\2\2\2;<\3\2\2\2<=\7@\2\2=>\7_\2\2>\f\3\2\2\2?@\7]\2\2")
-        buf.write("@A\7p\2\2AB\7q\2\2BC\7w\2\2CD\7p\2\2DL\7_\2\2EF\7]\2\2")
-        buf.write("FG\7P\2\2GH\7Q\2\2HI\7W\2\2IJ\7P\2\2JL\7_\2\2K?\3\2\2")
-        buf.write("\2KE\3\2\2\2L\16\3\2\2\2MN\7]\2\2NO\7c\2\2OP\7f\2\2PQ")
-        buf.write("\7l\2\2QX\7_\2\2RS\7]\2\2ST\7C\2\2TU\7F\2\2UV\7L\2\2V")
-        buf.write("X\7_\2\2WM\3\2\2\2WR\3\2\2\2X\20\3\2\2\2YZ\7]\2\2Z[\7")
-        buf.write("c\2\2[\\\7f\2\2\\]\7x\2\2]d\7_\2\2^_\7]\2\2_`\7C\2\2`")
-        buf.write("a\7F\2\2ab\7X\2\2bd\7_\2\2cY\3\2\2\2c^\3\2\2\2d\22\3\2")
-        buf.write("\2\2ef\7]\2\2fg\7q\2\2gh\7y\2\2hi\7n\2\2ip\7_\2\2jk\7")
-        buf.write("]\2\2kl\7Q\2\2lm\7Y\2\2mn\7N\2\2np\7_\2\2oe\3\2\2\2oj")
-        buf.write("\3\2\2\2p\24\3\2\2\2qr\7]\2\2rs\7e\2\2st\7q\2\2tu\7w\2")
-        buf.write("\2uv\7p\2\2vw\7v\2\2w\u0080\7_\2\2xy\7]\2\2yz\7E\2\2z")
-        buf.write("{\7Q\2\2{|\7W\2\2|}\7P\2\2}~\7V\2\2~\u0080\7_\2\2\177")
-        buf.write("q\3\2\2\2\177x\3\2\2\2\u0080\26\3\2\2\2\u0081\u0082\7")
-        buf.write("]\2\2\u0082\u0083\7o\2\2\u0083\u0084\7g\2\2\u0084\u0085")
-        buf.write("\7o\2\2\u0085\u0086\7d\2\2\u0086\u0087\7g\2\2\u0087\u0088")
-        buf.write("\7t\2\2\u0088\u0092\7_\2\2\u0089\u008a\7]\2\2\u008a\u008b")
-        buf.write("\7O\2\2\u008b\u008c\7G\2\2\u008c\u008d\7O\2\2\u008d\u008e")
-        buf.write("\7D\2\2\u008e\u008f\7G\2\2\u008f\u0090\7T\2\2\u0090\u0092")
-        buf.write("\7_\2\2\u0091\u0081\3\2\2\2\u0091\u0089\3\2\2\2\u0092")
-        buf.write("\30\3\2\2\2\u0093\u0094\7]\2\2\u0094\u0095\7c\2\2\u0095")
-        buf.write("\u0096\7w\2\2\u0096\u0097\7v\2\2\u0097\u0098\7j\2\2\u0098")
-        buf.write("\u0099\7q\2\2\u0099\u009a\7t\2\2\u009a\u00a4\7_\2\2\u009b")
-        buf.write("\u009c\7]\2\2\u009c\u009d\7C\2\2\u009d\u009e\7W\2\2\u009e")
-        buf.write("\u009f\7V\2\2\u009f\u00a0\7J\2\2\u00a0\u00a1\7Q\2\2\u00a1")
-        buf.write("\u00a2\7T\2\2\u00a2\u00a4\7_\2\2\u00a3\u0093\3\2\2\2\u00a3")
-        buf.write("\u009b\3\2\2\2\u00a4\32\3\2\2\2\u00a5\u00a6\7]\2\2\u00a6")
-        buf.write("\u00a7\7e\2\2\u00a7\u00a8\7c\2\2\u00a8\u00a9\7r\2\2\u00a9")
-        buf.write("\u00aa\7v\2\2\u00aa\u00ab\7w\2\2\u00ab\u00ac\7t\2\2\u00ac")
-        buf.write("\u00ad\7g\2\2\u00ad\u00b8\7_\2\2\u00ae\u00af\7]\2\2\u00af")
-        buf.write("\u00b0\7E\2\2\u00b0\u00b1\7C\2\2\u00b1\u00b2\7R\2\2\u00b2")
-        buf.write("\u00b3\7V\2\2\u00b3\u00b4\7W\2\2\u00b4\u00b5\7T\2\2\u00b5")
-        buf.write("\u00b6\7G\2\2\u00b6\u00b8\7_\2\2\u00b7\u00a5\3\2\2\2\u00b7")
-        buf.write("\u00ae\3\2\2\2\u00b8\34\3\2\2\2\u00b9\u00bb\t\4\2\2\u00ba")
-        buf.write("\u00b9\3\2\2\2\u00bb\u00bc\3\2\2\2\u00bc\u00ba\3\2\2\2")
-        buf.write("\u00bc\u00bd\3\2\2\2\u00bd\u00be\3\2\2\2\u00be\u00bf\b")
-        buf.write("\17\2\2\u00bf\36\3\2\2\2\20\2(.\64:KWco\177\u0091\u00a3")
-        buf.write("\u00b7\u00bc\3\b\2\2")
-        return buf.getvalue()
-
-
-class ResponseLexer(Lexer):
-
-    atn = ATNDeserializer().deserialize(serializedATN())
-
-    decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(atn.decisionToState) ]
-
-    T__0 = 1
-    T__1 = 2
-    T__2 = 3
-    STRING = 4
-    REACT = 5
-    NOUN = 6
-    ADJ = 7
-    ADV = 8
-    OWL = 9
-    COUNT = 10
-    MEMBER = 11
-    AUTHOR = 12
-    CAPTURE = 13
-    WS = 14
-
-    channelNames = [ u"DEFAULT_TOKEN_CHANNEL", u"HIDDEN" ]
-
-    modeNames = [ "DEFAULT_MODE" ]
-
-    literalNames = [ "<INVALID>",
-            "'['", "']'", "','" ]
-
-    symbolicNames = [ "<INVALID>",
-            "STRING", "REACT", "NOUN", "ADJ", "ADV", "OWL", "COUNT", "MEMBER", 
-            "AUTHOR", "CAPTURE", "WS" ]
-
-    ruleNames = [ "T__0", "T__1", "T__2", "STRING", "REACT", "NOUN", "ADJ", 
-                  "ADV", "OWL", "COUNT", "MEMBER", "AUTHOR", "CAPTURE", 
-                  "WS" ]
-
-    grammarFileName = "Response.g4"
-
-    def __init__(self, input=None, output:TextIO = sys.stdout):
-        super().__init__(input, output)
-        self.checkVersion("4.7.2")
-        self._interp = LexerATNSimulator(self, self.atn, self.decisionsToDFA, PredictionContextCache())
-        self._actions = None
-        self._predicates = None
-
-
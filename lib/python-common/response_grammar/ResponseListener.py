@@ -1,46 +0,0 @@
-# Generated from Response.g4 by ANTLR 4.7.2
-from antlr4 import *
-if __name__ is not None and "." in __name__:
-    from .ResponseParser import ResponseParser
-else:
-    from ResponseParser import ResponseParser
-
-# This class defines a complete listener for a parse tree produced by ResponseParser.
-class ResponseListener(ParseTreeListener):
-
-    # Enter a parse tree produced by ResponseParser#response.
-    def enterResponse(self, ctx:ResponseParser.ResponseContext):
-        pass
-
-    # Exit a parse tree produced by ResponseParser#response.
-    def exitResponse(self, ctx:ResponseParser.ResponseContext):
-        pass
-
-
-    # Enter a parse tree produced by ResponseParser#respObj.
-    def enterRespObj(self, ctx:ResponseParser.RespObjContext):
-        pass
-
-    # Exit a parse tree produced by ResponseParser#respObj.
-    def exitRespObj(self, ctx:ResponseParser.RespObjContext):
-        pass
-
-
-    # Enter a parse tree produced by ResponseParser#respList.
-    def enterRespList(self, ctx:ResponseParser.RespListContext):
-        pass
-
-    # Exit a parse tree produced by ResponseParser#respList.
-    def exitRespList(self, ctx:ResponseParser.RespListContext):
-        pass
-
-
-    # Enter a parse tree produced by ResponseParser#listElement.
-    def enterListElement(self, ctx:ResponseParser.ListElementContext):
-        pass
-
-    # Exit a parse tree produced by ResponseParser#listElement.
-    def exitListElement(self, ctx:ResponseParser.ListElementContext):
-        pass
-
-
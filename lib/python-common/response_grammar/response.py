@@ -7,8 +7,9 @@ shortcode_id = re.compile(r"\[ ?<:(\w+):(\d+)> ?\]")
 unicode_react = re.compile(r"\[ ?([^\x00-\x7F]+) ?\]")
 animated = re.compile(r"\[ ?<a:(\w+):(\d+)> ?\]")
 capture = re.compile("\[(\\d+)\]")
-url = re.compile("(https?://[\\w\\.-]{2,})/?")
-eval_token = re.compile(r"\A\[(?:eval|e) (.*)\]")
+
+# bump whenever the layout produced by dumps changes so stored asts get reparsed
+AST_FORMAT_VERSION = 1
 
 
 class ParseError(Exception):
@@ -55,30 +56,135 @@ def serialize(obj):
     return obj
 
 
+# how many distinct leaves are shared at most
+LEAF_LIMIT = 4096
+_leaves = {}
+
+
 class Node:
-    def __init__(self):
-        self.type = None
-        self.text = None
-        self.parent = None
-        self.children = []
-        self.shortcode = None
-        self.id = -1
-        self.animated = False
-        self.capture_group = -1
-        self.unicode = False
+    """
+    A node of a parsed response. Nodes are immutable so leaves that don't depend on
+    where they appear, like [noun] or a react, are shared between every response.
+    Only reacts and numbered captures store the fields below, every other node
+    reads the class defaults.
+    """
+    __slots__ = ('type', 'text', 'children')
+    shortcode = None
+    id = -1
+    animated = False
+    capture_group = -1
+    unicode = False
+
+    def __init__(self, type, text=None, children=()):
+        object.__setattr__(self, 'type', type)
+        object.__setattr__(self, 'text', text)
+        object.__setattr__(self, 'children', children)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+class ReactNode(Node):
+    __slots__ = ('shortcode', 'id', 'animated', 'unicode')
+
+    def __init__(self, text, shortcode, id, animated, unicode):
+        super().__init__(NodeType.React, text)
+        object.__setattr__(self, 'shortcode', shortcode)
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'animated', animated)
+        object.__setattr__(self, 'unicode', unicode)
+
+
+class CaptureNode(Node):
+    __slots__ = ('capture_group',)
+
+    def __init__(self, text, capture_group):
+        super().__init__(NodeType.Capture, text)
+        object.__setattr__(self, 'capture_group', capture_group)
+
+
+def leaf(node_type, text, *fields):
+    """
+    The shared leaf of a type with the given text, and for reacts and numbered captures, fields.
+    """
+    key = (node_type, text)
+    node = _leaves.get(key)
+    if node is None:
+        if node_type == NodeType.React:
+            node = ReactNode(text, *fields)
+        elif fields:
+            node = CaptureNode(text, *fields)
+        else:
+            node = Node(node_type, text)
+        if len(_leaves) < LEAF_LIMIT:
+            _leaves[key] = node
+    return node
 
 
 class Response:
-    def __init__(self):
-        self.children = []
-        self.parent = None
-        self.type = NodeType.Root
+    __slots__ = ('children',)
+    type = NodeType.Root
+
+    def __init__(self, children=()):
+        object.__setattr__(self, 'children', children)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Response is immutable")
 
     def stringify(self):
         return tree_string(self)
 
 
-def tree_string(node, tree=[]):
+def _encode(node):
+    entry = [node.type.name, node.text]
+    if node.type == NodeType.React:
+        entry.extend((node.shortcode, node.id, node.animated, node.unicode))
+    elif node.type == NodeType.Capture:
+        entry.append(node.capture_group)
+    elif node.children:
+        entry.append([_encode(c) for c in node.children])
+    return entry
+
+
+def _decode(entry):
+    node_type = NodeType[entry[0]]
+    if node_type == NodeType.React:
+        return leaf(node_type, entry[1], *entry[2:6])
+    if node_type == NodeType.Capture:
+        return leaf(node_type, entry[1], entry[2]) if entry[2] != -1 else leaf(node_type, entry[1])
+    if node_type in (NodeType.List, NodeType.ListElement, NodeType.PlainText, NodeType.Url, NodeType.Eval):
+        return Node(node_type, entry[1], tuple(_decode(c) for c in entry[2]) if len(entry) > 2 else ())
+    return leaf(node_type, entry[1])
+
+
+def dumps(response):
+    """
+    Serialize a parsed response so it can be stored and loaded without parsing it again.
+    Each node is a list of its type name and text followed by its type-specific fields.
+    """
+    return json.dumps({
+        'version': AST_FORMAT_VERSION,
+        'children': [_encode(c) for c in response.children]
+    }, separators=(',', ':'))
+
+
+def loads(data):
+    """
+    Load a response serialized by dumps.
+    Raises ValueError if the data was written in any other format.
+    """
+    rep = json.loads(data)
+    if not isinstance(rep, dict) or rep.get('version') != AST_FORMAT_VERSION:
+        raise ValueError("Unsupported response ast format")
+    return Response(tuple(_decode(c) for c in rep['children']))
+
+
+def tree_string(node, tree=None):
+    if tree is None:
+        tree = []
     if (node.type == NodeType.List):
         tree.append(("open", "["))
         for c in node.children:
@@ -159,169 +265,187 @@ def parse_capture(string, i=0):
     return i, None
 
 
-def parse(string):
-    base = Response()
-    curr = base
-    root_ctx = True
+KEYWORDS = {
+    '[adv]': NodeType.Adv,
+    '[adj]': NodeType.Adj,
+    '[noun]': NodeType.Noun,
+    '[count]': NodeType.Count,
+    '[member]': NodeType.Member,
+    '[author]': NodeType.Author,
+    '[capture]': NodeType.Capture,
+}
+LONGEST_KEYWORD = max(len(k) for k in KEYWORDS)
+
+# token kinds produced by tokenize
+OPEN, CLOSE, COMMA, NODE = range(4)
+
+# a url is http:// or https:// then at least two of these and maybe a slash, running up to the
+# next space, closing bracket or comma
+URL_CHARACTERS = frozenset("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_.-")
+
+
+class _Next:
+    """
+    Where a substring next appears at or after a position, for positions that never go
+    backwards, so the string is only searched once however often it's asked.
+    """
+    __slots__ = ('string', 'sub', 'at')
+
+    def __init__(self, string, sub):
+        self.string = string
+        self.sub = sub
+        self.at = -1
+
+    def __call__(self, i):
+        if self.at < i:
+            self.at = self.string.find(self.sub, i)
+            if self.at == -1:
+                self.at = len(self.string)
+        return self.at
+
+
+def tokenize(string):
+    """
+    Split a response into (kind, position, node) tokens in a single pass. OPEN, CLOSE and
+    COMMA tokens give the list structure, NODE tokens carry every other node. Whether a
+    comma separates list elements depends on the lists opened and closed so far, which are
+    taken as balanced; parse checks that they are.
+    """
+    n = len(string)
+    next_open = _Next(string, '[')
+    next_close = _Next(string, ']')
+    next_comma = _Next(string, ',')
+    next_space = _Next(string, ' ')
+    next_escape = _Next(string, '\\')
+    next_http = _Next(string, 'http')
+    next_newline = _Next(string, '\n')
+    # the last run of url characters found, reused for urls starting inside it
+    run_start = run_end = 0
+
+    depth = 0
     i = 0
-    while i < len(string):
-        root_ctx = True if curr == base else False
-        if string[i] == '[' and string.find(']', i) == -1:
-            raise ParseError("Unmatched bracket", i)
-        if string[i] == ']':
-            curr = curr.parent
-            if curr == None:
-                raise ParseError("This bracket has no opening bracket", i + 1)
-            curr = curr.parent
-            if curr == None:
-                raise ParseError("This bracket has no opening bracket", i + 1)
+    while i < n:
+        c = string[i]
+        if c == '[':
+            close = next_close(i)
+            if close == n:
+                raise ParseError("Unmatched bracket", i)
+            # reacts, captures and keywords never contain another bracket
+            if next_open(i + 1) > close:
+                j, a, shortcode, cid, uni = parse_react(string, i)
+                if shortcode is not None:
+                    yield NODE, i, leaf(NodeType.React, string[i:j], shortcode, cid, a, uni)
+                    i = j
+                    continue
+                k, group = parse_capture(string, i)
+                if group is not None:
+                    yield NODE, i, leaf(NodeType.Capture, string[i:k], group)
+                    i = k
+                    continue
+                if close - i < LONGEST_KEYWORD:
+                    node_type = KEYWORDS.get(string[i:close + 1].lower())
+                    if node_type is not None:
+                        yield NODE, i, leaf(node_type, string[i:close + 1])
+                        i = close + 1
+                        continue
+            # evals run to the last bracket on their line
+            start = i + 6 if string.startswith('[eval ', i) else i + 3 if string.startswith('[e ', i) else -1
+            if start != -1 and close < next_newline(i):
+                last = string.rfind(']', close, next_newline(i))
+                yield NODE, i, Node(NodeType.Eval, string[start:last])
+                i = last + 1
+                continue
+            yield OPEN, i, None
+            depth += 1
             i += 1
-            continue
-        elif string[i] == '[':
-            j, a, shortcode, cid, uni = parse_react(string, i)
-            k, capture = parse_capture(string, i)
-            if shortcode is not None:
-                node = Node()
-                node.type = NodeType.React
-                node.parent = curr
-                node.shortcode = shortcode
-                node.animated = a
-                node.id = cid
-                node.unicode = uni
-                node.text = string[i:j]
-                curr.children.append(node)
-                i = j
-            elif capture is not None:
-                node = Node()
-                node.type = NodeType.Capture
-                node.parent = curr
-                node.capture_group = capture
-                node.text = string[i:k]
-                curr.children.append(node)
-                i = k
-            elif i + 5 <= len(string) and string[i:i+5].lower() == '[adv]':
-                node = Node()
-                node.type = NodeType.Adv
-                node.text = string[i:i+5]
-                node.parent = curr
-                curr.children.append(node)
-                i += 5
-            elif i + 5 <= len(string) and string[i:i+5].lower() == '[adj]':
-                node = Node()
-                node.type = NodeType.Adj
-                node.text = string[i:i+5]
-                node.parent = curr
-                curr.children.append(node)
-                i += 5
-            elif i + 6 <= len(string) and string[i:i+6].lower() == '[noun]':
-                node = Node()
-                node.type = NodeType.Noun
-                node.text = string[i:i+6]
-                node.parent = curr
-                curr.children.append(node)
-                i += 6
-            elif i + 7 <= len(string) and string[i:i+7].lower() == '[count]':
-                node = Node()
-                node.type = NodeType.Count
-                node.text = string[i:i+7]
-                node.parent = curr
-                curr.children.append(node)
-                i += 7
-            elif i + 8 <= len(string) and string[i:i+8].lower() == '[member]':
-                node = Node()
-                node.type = NodeType.Member
-                node.text = string[i:i+8]
-                node.parent = curr
-                curr.children.append(node)
-                i += 8
-            elif i + 8 <= len(string) and string[i:i+8].lower() == '[author]':
-                node = Node()
-                node.type = NodeType.Author
-                node.text = string[i:i+8]
-                node.parent = curr
-                curr.children.append(node)
-                i += 8
-            elif i + 9 <= len(string) and string[i:i+9].lower() == '[capture]':
-                node = Node()
-                node.type = NodeType.Capture
-                node.text = string[i:i+9]
-                node.parent = curr
-                curr.children.append(node)
-                i += 9
-            elif m := eval_token.search(string[i:]):
-                node = Node()
-                node.type = NodeType.Eval
-                node.text = m.group(1)
-                node.parent = curr
-                curr.children.append(node)
-                i += m.end()
-            else:
-                node = Node()
-                node.type = NodeType.List
-                node.parent = curr
-                curr.children.append(node)
-                curr = node
-                node = Node()
-                node.type = NodeType.ListElement
-                node.parent = curr
-                curr.children.append(node)
-                curr = node
-                i += 1
-            continue
-        elif string[i] == "," and not root_ctx:
-            curr = curr.parent
-            node = Node()
-            node.parent = curr
-            node.type = NodeType.ListElement
-            curr.children.append(node)
-            curr = node
+        elif c == ']':
+            yield CLOSE, i, None
+            depth -= 1
+            i += 1
+        elif c == ',' and depth > 0:
+            yield COMMA, i, None
             i += 1
         else:
-            text = ""
-            while i < len(string) and string[i] != "[" and string[i] != "]":
-                if string[i] == "\\":
-                    text += string[i+1]
+            chunks = []
+            while i < n:
+                stop = min(next_open(i), next_close(i), next_comma(i), next_escape(i), next_http(i))
+                chunks.append(string[i:stop])
+                i = stop
+                if stop == n or string[stop] in '[]' or (string[stop] == ',' and depth > 0):
+                    break
+                if string[stop] == ',':
+                    chunks.append(',')
+                    i += 1
+                    continue
+                if string[stop] == '\\':
+                    if stop + 1 == n:
+                        raise ParseError("There is nothing to escape", n)
+                    chunks.append(string[stop + 1])
                     i += 2
                     continue
-                if string[i] != " ":
-                    ends = [string.find(" ", i), string.find("]", i), string.find(",", i)]
-                    end = len(string)
-                    for e in ends:
-                        if e != -1 and e < end:
-                            end = e
-                    m = url.fullmatch(string[i:end])
-                    if m is not None:
-                        if text != "":
-                            node = Node()
-                            node.type = NodeType.PlainText
-                            node.text = text
-                            node.parent = curr
-                            curr.children.append(node)
-                        node = Node()
-                        node.type = NodeType.Url
-                        node.text = string[i:end]
-                        node.parent = curr
-                        curr.children.append(node)
-                        text = ""
+
+                if string.startswith('://', stop + 4):
+                    body = stop + 7
+                elif string.startswith('s://', stop + 4):
+                    body = stop + 8
+                else:
+                    body = -1
+                if body != -1:
+                    end = min(next_space(stop), next_close(stop), next_comma(stop))
+                    if not run_start <= body < run_end:
+                        run_start = run_end = body
+                        while run_end < n and string[run_end] in URL_CHARACTERS:
+                            run_end += 1
+                    tail = end - 1 if run_end == end - 1 and string[run_end] == '/' else end
+                    if run_end == tail and tail - body >= 2:
+                        text = "".join(chunks)
+                        if text:
+                            yield NODE, i, Node(NodeType.PlainText, text)
+                        yield NODE, i, Node(NodeType.Url, string[stop:end])
+                        chunks = []
                         i = end
                         continue
-                if string[i] == "," and curr.type == NodeType.ListElement:
-                    break
-                text += string[i]
+                chunks.append(string[stop])
                 i += 1
-            if text != "":
-                node = Node()
-                node.type = NodeType.PlainText
-                node.text = text
-                node.parent = curr
-                curr.children.append(node)
-
-    if curr != base:
+            text = "".join(chunks)
+            if text:
+                yield NODE, i, Node(NodeType.PlainText, text)
+
+
+def parse(string):
+    """
+    Parse a response into its tree. Raises ParseError with the position of the problem if
+    the brackets don't balance.
+    """
+    # children of the list element being parsed, or of the root outside any list
+    curr = []
+    # for each open list, the children it is inside of and its finished elements
+    stack = []
+    for kind, i, node in tokenize(string):
+        if kind == NODE:
+            curr.append(node)
+        elif kind == OPEN:
+            stack.append((curr, []))
+            curr = []
+        elif kind == COMMA:
+            stack[-1][1].append(Node(NodeType.ListElement, children=tuple(curr)))
+            curr = []
+        else:
+            if not stack:
+                raise ParseError("This bracket has no opening bracket", i + 1)
+            parent, elements = stack.pop()
+            elements.append(Node(NodeType.ListElement, children=tuple(curr)))
+            parent.append(Node(NodeType.List, children=tuple(elements)))
+            curr = parent
+
+    if stack:
         raise ParseError("Missed a closing bracket somewhere", len(string))
-    return base
+    return Response(tuple(curr))
 
 
-def walk(tree, discovered=[]):
+def walk(tree, discovered=None):
+    if discovered is None:
+        discovered = []
     if tree.type != NodeType.Root:
         if tree.type == NodeType.React:
             print(f"( {tree.type}: {tree.animated}, {tree.shortcode}, {tree.id}, {tree.unicode}")
@@ -332,9 +456,8 @@ def walk(tree, discovered=[]):
     else:
         print(f"( {tree.type}")
     for c in tree.children:
-        if c not in discovered:
-            discovered.append(c)
-            discovered = walk(c, discovered)
+        discovered.append(c)
+        discovered = walk(c, discovered)
     print(")")
     return discovered
 
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from lib.reggy.fsm import VECTORIZE_MIN_STRINGS
+from lib.reggy.reggy import Reggy
+
+np = pytest.importorskip("numpy")
+
+regexes = ["hello", "(.*) bot", "[^abc]+x", ".*", "(a|b)*a(a|b){4}", "", "h(i+)", ".", "\\W+", "x{2,4}"]
+
+
+def random_strings(n):
+    rng = random.Random(0)
+    chars = "abchilxyz0 9?.-botmesnfé\U0001f600"
+    return [''.join(rng.choice(chars) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("regex", regexes)
+def test_vectorized_matches_reference(regex):
+    fsm = Reggy(regex).fsm
+    strings = random_strings(2000) + ["hello", "good bot", "", "xx", "\ud800"]
+    result = fsm.accepts_many(strings, vectorized=True)
+    assert isinstance(result, np.ndarray) and result.dtype == bool
+    assert result.tolist() == fsm.accepts_many(strings, vectorized=False).tolist()
+    assert result.tolist() == [fsm.accepts(s) for s in strings]
+
+
+def test_default_picks_by_size():
+    fsm = Reggy("h(i+)").fsm
+    strings = random_strings(VECTORIZE_MIN_STRINGS)
+    for batch in (strings[:10], strings):
+        result = fsm.accepts_many(batch)
+        assert isinstance(result, np.ndarray) and result.dtype == bool
+        assert result.tolist() == [fsm.accepts(s) for s in batch]
+
+
+def test_no_strings():
+    assert len(Reggy("a").fsm.accepts_many([])) == 0
+    assert len(Reggy("a").fsm.accepts_many([], vectorized=True)) == 0
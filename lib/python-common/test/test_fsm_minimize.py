@@ -0,0 +1,68 @@
+import pytest
+
+from lib.reggy.reggy import Pattern
+
+# trigger regexes the way auto responses store them, lowercased with punctuation handled
+triggers = [
+    "hello",
+    "good bot",
+    "bad bot",
+    "f",
+    "owo",
+    "what's up",
+    "hey there",
+    "ping",
+    "who asked",
+    "h(i+)",
+    "(.*) bot",
+    "i'?m (.*)",
+    "x{2,4}",
+    "[a-z]{1,5}",
+    "\\d+",
+    "[^abc]+x",
+    ".*hello.*",
+    "(\\w+ ){1,3}\\w+",
+    "(ha)+( ?lo+l)*",
+    "(yes|no|maybe)\\?",
+    "a|ab|abc",
+    "(a*)*b",
+    "x[^x]",
+    "(lol|lmao|rofl)+",
+    "no+ ?u",
+    "pog(gers)?",
+    "[aeiou]{3,}",
+    "(a|b)*a(a|b){5}",
+    ".+ and .+",
+    "\\W+",
+    "[0-9a-f]{2,}",
+    "",
+    "[]",
+]
+
+samples = [
+    "", "f", "hello", "hi", "hiiii", "good bot", "bad bot", "a bot", "xx", "xxxx", "xxxxx", "abc", "ab",
+    "12", "ffe", "yes?", "no?", "hahaha lool", "nooo u", "poggers", "aeiou", "lollmao", "aababa",
+    "cats and dogs", "!!", "i'm tired", "im here", "what's up", "x y z", "dx", "xd",
+]
+
+
+@pytest.mark.parametrize("regex", triggers)
+def test_hopcroft_matches_brzozowski(regex):
+    fsm = Pattern.parse(regex).to_fsm()
+    hopcroft = fsm.reduce()
+    brzozowski = fsm.reduce(brzozowski=True)
+
+    assert hopcroft.equivalent(brzozowski)
+    assert len(hopcroft.states) == len(brzozowski.states)
+    assert hopcroft.initial == brzozowski.initial
+    assert hopcroft.accepting == brzozowski.accepting
+    assert hopcroft.transition == brzozowski.transition
+    for s in samples:
+        assert hopcroft.accepts(s) == fsm.accepts(s)
+
+
+def test_hopcroft_empty_language():
+    fsm = Pattern.parse("a").to_fsm() & Pattern.parse("b").to_fsm()
+    reduced = fsm.reduce()
+    assert reduced.empty()
+    assert len(reduced.states) == 1
@@ -0,0 +1,19 @@
+import pytest
+import re2
+
+from lib.benchmarks import fuzz
+from lib.reggy.reggy import Reggy
+
+
+@pytest.mark.parametrize("regex", ["[a-c]", "[^a-c]", "[-a]", "[a-]", "[^-a]", "[x-z_]+", "[0-9a-f]{2}", "\\d[a-]"])
+def test_bracket_ranges(regex):
+    reggy = Reggy(regex)
+    pattern = re2.compile(regex)
+    for s in ["a", "b", "c", "d", "-", "0", "5", "f", "g", "x", "y", "_", "00", "af", "3-", "3a", "a-"]:
+        assert reggy.fsm.accepts(s) == (pattern.fullmatch(s) is not None), s
+
+
+@pytest.mark.parametrize("block", range(4))
+def test_fsm_agrees_with_re2(block):
+    for seed in range(block * 100, (block + 1) * 100):
+        assert fuzz.check(seed) is None, f"seed {seed}"
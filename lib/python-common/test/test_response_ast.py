@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from lib.response_grammar.response import parse, dumps, loads, tree_string, AST_FORMAT_VERSION, NodeType
+
+responses = [
+    "hello",
+    "hello [adj] [this is a list, with nested stuff [noun], [[member], [author]]]",
+    "[:thumbsup:] nice [<:pog:123456789>] [<a:dance:987654321>] [🎉 ]",
+    "you said [0] and [1] but not [capture]",
+    "[count] times, [adv] [adj] [noun]",
+    "check out https://archit.us/ and [http://example.com, https://docs.archit.us]",
+    "escaped \\[brackets\\] and \\, commas",
+    "[eval p('hi')]",
+    "[a, [b, c], , d]",
+    "",
+]
+
+
+def assert_same_tree(a, b):
+    assert a.type == b.type
+    assert getattr(a, 'text', None) == getattr(b, 'text', None)
+    if hasattr(a, 'shortcode'):
+        assert (a.shortcode, a.id, a.animated, a.unicode, a.capture_group) == \
+            (b.shortcode, b.id, b.animated, b.unicode, b.capture_group)
+    assert len(a.children) == len(b.children)
+    for x, y in zip(a.children, b.children):
+        assert_same_tree(x, y)
+
+
+@pytest.mark.parametrize("response", responses)
+def test_round_trip(response):
+    tree = parse(response)
+    loaded = loads(dumps(tree))
+    assert_same_tree(tree, loaded)
+    assert loaded.stringify() == tree.stringify()
+    assert dumps(loaded) == dumps(tree)
+
+
+@pytest.mark.parametrize("response", responses)
+def test_stringify_is_repeatable(response):
+    tree = parse(response)
+    for child in tree.children:
+        assert tree_string(child) == tree_string(child)
+    assert tree.stringify() == parse(response).stringify()
+
+
+def test_rejects_other_versions():
+    data = json.loads(dumps(parse("hello [noun]")))
+    data['version'] = AST_FORMAT_VERSION + 1
+    with pytest.raises(ValueError):
+        loads(json.dumps(data))
+
+
+def test_rejects_legacy_token_list():
+    with pytest.raises(ValueError):
+        loads(json.dumps(parse("hello [noun]").stringify()))
+
+
+def test_leaves_are_shared_and_immutable():
+    a = parse("[noun] [:thumbsup:] [1]")
+    b = loads(dumps(parse("[adj] [noun], [:thumbsup:] [1]")))
+    assert a.children[0] is b.children[2]
+    assert a.children[2] is b.children[4]
+    assert a.children[4] is b.children[6]
+    assert b.children[4].type == NodeType.React and b.children[4].shortcode == "thumbsup"
+    assert b.children[6].capture_group == 1
+    with pytest.raises(AttributeError):
+        a.children[0].text = "[adj]"
+    with pytest.raises(AttributeError):
+        a.children = ()
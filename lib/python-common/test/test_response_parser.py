@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from lib.benchmarks.corpus import RESPONSES
+from lib.benchmarks.response_parse import reference_parse, long_response
+from lib.response_grammar.response import parse, ParseError
+
+pieces = [
+    "[", "]", ",", " ", "a", "h", "\n", "\\", "\\,", "\\]", "[noun]", "[NoUn]", "[adj]", "[capture]", "[1]",
+    "[12 ]", "[:x:]", "[ :x: ]", "[<:a:12>]", "[<a:b:3>]", "[🎉 ]", "[eval p(1)]", "[e ", "[eval", "eval ",
+    "http://", "https://", "http://a", "https://archit.us", "https://archit.us/", "http://a.b/c", "ab.", "-_",
+    "/", "[member]", "[author]", "[count]", "[adv]",
+]
+
+
+def outcome(parser, string):
+    try:
+        return parser(string), None
+    except ParseError as e:
+        return None, (e.message, e.position)
+
+
+def assert_same_tree(a, b):
+    assert a.type == b.type
+    assert (a.text, a.shortcode, a.id, a.animated, a.unicode, a.capture_group) == \
+        (b.text, b.shortcode, b.id, b.animated, b.unicode, b.capture_group)
+    assert len(a.children) == len(b.children)
+    for x, y in zip(a.children, b.children):
+        assert_same_tree(x, y)
+
+
+def assert_same_outcome(string):
+    try:
+        expected, expected_error = outcome(reference_parse, string)
+    except IndexError:
+        # the previous parser crashed on a trailing backslash
+        assert string.endswith("\\")
+        with pytest.raises(ParseError):
+            parse(string)
+        return
+    tree, error = outcome(parse, string)
+    assert error == expected_error, string
+    if tree is not None:
+        assert len(tree.children) == len(expected.children), string
+        for x, y in zip(tree.children, expected.children):
+            assert_same_tree(x, y)
+
+
+@pytest.mark.parametrize("response", RESPONSES + ("", "]", "[", "a]", "[a", "[a]]", "\\", "[e x\n]"))
+def test_matches_reference_on_corpus(response):
+    assert_same_outcome(response)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_on_random_responses(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        assert_same_outcome("".join(rng.choice(pieces) for _ in range(rng.randint(0, 12))))
+
+
+def test_matches_reference_on_long_responses():
+    for seed in range(3):
+        assert_same_outcome(long_response(3000, seed))
@@ -68,6 +68,18 @@ class Architus(Bot):
                 logger.exception("Error starting shard, retrying in 10 seconds...")
                 time.sleep(10)
 
+    async def close(self):
+        """give cogs holding unwritten data a chance to flush it before disconnecting"""
+        for name, cog in tuple(self.cogs.items()):
+            flush = getattr(cog, 'flush', None)
+            if flush is None:
+                continue
+            try:
+                await flush()
+            except Exception:
+                logger.exception(f"error flushing {name} during shutdown")
+        await super().close()
+
     async def on_socket_raw_receive(self, msg):
         if "Slash" in self.cogs:
             await self.cogs['Slash'].on_socket_raw_receive(msg)
@@ -127,7 +127,7 @@ class Api(Cog):
                 g = guild_to_dict(guild)
                 g.update({
                     "has_architus": True,
-                    "architus_admin": int(user_id) in settings.admins_ids,
+                    "architus_admin": int(user_id) in settings.admin_set,
                     'permissions': member.guild_permissions.value,
                 })
                 users_guilds.append(g)
@@ -143,14 +143,14 @@ class Api(Cog):
         super_admin = user_id in (214037134477230080,)
         return {
             'member': bool(member) or super_admin,
-            'admin': int(user_id) in settings.admins_ids or super_admin,
+            'admin': int(user_id) in settings.admin_set or super_admin,
             'permissions': member.guild_permissions.value if member else 0,
         }, sc.OK_200
 
     async def get_permissions(self, user_id: int, guild_id: int):
         guild = self.bot.get_guild(int(guild_id))
         settings = self.bot.settings[guild]
-        default = not guild or not settings and user_id not in settings.admin_ids
+        default = not guild or not settings and user_id not in settings.admin_set
         return {'permissions': 274 if default else 65535}
 
     async def delete_response(self, user_id, guild_id, trigger):
@@ -232,7 +232,7 @@ class Api(Cog):
     @fetch_guild
     async def load_max_emojis(self, guild: discord.Guild, member_id: int):
         emoji_manager = self.bot.cogs['Emoji Manager'].managers[guild.id]
-        if member_id not in self.bot.settings[guild].admin_ids:
+        if member_id not in self.bot.settings[guild].admin_set:
             return {'message': "only admins may load max emoji"}, sc.UNAUTHORIZED_401
         emojis = await emoji_manager.load_max_emojis()
         return {'emojis': [e.as_dict() for e in emojis]}, sc.OK_200
@@ -241,7 +241,7 @@ class Api(Cog):
     async def emoji_manager_conf(self, guild: discord.Guild, member_id: int, enabled: Optional[bool] = None):
         emoji_manager = self.bot.cogs['Emoji Manager'].managers[guild.id]
         settings = self.bot.settings[guild]
-        if enabled is not None and member_id in settings.admin_ids:
+        if enabled is not None and member_id in settings.admin_set:
             settings.manage_emojis = bool(enabled)
         return {
             'enabled': settings.manage_emojis,
@@ -254,7 +254,7 @@ class Api(Cog):
         emoji_manager = self.bot.cogs['Emoji Manager'].managers[guild.id]
         settings = self.bot.settings[guild]
         emoji = emoji_manager.find_emoji(a_id=emoji_id)
-        is_admin = member_id in settings.admin_ids
+        is_admin = member_id in settings.admin_set
         member = guild.get_member(member_id)
 
         if not settings.manage_emojis:
@@ -273,7 +273,7 @@ class Api(Cog):
         emoji_manager = self.bot.cogs['Emoji Manager'].managers[guild.id]
         settings = self.bot.settings[guild]
         emoji = emoji_manager.find_emoji(a_id=emoji_id)
-        is_admin = member_id in settings.admin_ids
+        is_admin = member_id in settings.admin_set
         member = guild.get_member(member_id)
 
         if not settings.manage_emojis:
@@ -296,7 +296,7 @@ class Api(Cog):
         emoji = emoji_manager.find_emoji(a_id=emoji_id)
         if emoji is None:
             return {'message': "unknown emoji"}, sc.BAD_REQUEST_400
-        if emoji.author_id != member.id and member.id not in self.bot.settings[guild].admin_ids:
+        if emoji.author_id != member.id and member.id not in self.bot.settings[guild].admin_set:
             return {'message': "you must own this emoji or have admin permissions"}, sc.UNAUTHORIZED_401
         await emoji_manager.delete_emoji(emoji)
         return {'message': "successfully deleted"}, sc.OK_200
@@ -313,7 +313,7 @@ class Api(Cog):
         settings = self.bot.settings[guild]
         member = guild.get_member(int(member_id))
         channel = guild.get_channel(int(channel_id))
-        if member is None or member.id not in settings.admin_ids:
+        if member is None or member.id not in settings.admin_set:
             return {'content': "Admins only"}, sc.UNAUTHORIZED_401
         resp = await self.bot.cogs['Roles'].setup_roles(
             guild, channel, {e: guild.get_role(int(r)) for e, r in react_roles.items()})
@@ -374,7 +374,10 @@ class Api(Cog):
         elif pool_type == PoolType.GUILD:
             return {'error': "Invalid Pool"}, sc.BAD_REQUEST_400
         elif pool_type == PoolType.AUTO_RESPONSE:
-            return {'data': self.pools.get_all_responses(guild)}, sc.OK_200
+            responses = self.pools.get_all_responses(guild)
+            if responses is None:
+                return {'data': [], 'loading': True}, sc.ACCEPTED_202
+            return {'data': responses}, sc.OK_200
         elif pool_type == PoolType.SETTING_VALUE:
             pass
         else:
@@ -2,6 +2,7 @@ from discord import Guild
 from discord.errors import NotFound
 
 from contextlib import suppress
+from typing import List, Optional
 
 from src.utils import channel_to_dict, member_to_dict, role_to_dict, user_to_dict, guild_to_dict
 
@@ -65,12 +66,18 @@ class Pools:
             raise NotFound(f"unknown user {user_id}")
         return user_to_dict(user)
 
-    def get_all_responses(self, guild: Guild):
-        try:
-            auto_responses = self.bot.get_cog("Auto Responses").responses[guild.id]
-        except KeyError:
+    def get_all_responses(self, guild: Guild) -> Optional[List[dict]]:
+        """
+        The guild's auto responses, or None if they aren't loaded yet. Loading can mean compiling
+        triggers, so it's started in the background rather than waited on.
+        """
+        cog = self.bot.get_cog("Auto Responses")
+        if cog is None:
             return []
-        return [r.as_dict() for r in auto_responses.auto_responses]
+        if cog.responses.state(guild.id) != 'loaded':
+            cog.responses.load_later(guild)
+            return None
+        return [r.as_dict() for r in cog.responses[guild.id].auto_responses]
 
     async def get_guild(self, member_id: int, guild_id: int, fetch=False):
         guild = self.bot.get_guild(int(guild_id))
@@ -87,7 +94,7 @@ class Pools:
         g.update({
             'owner': int(g['owner_id']) == int(member_id),
             'has_architus': True,
-            'architus_admin': int(member_id) in settings.admins_ids,
+            'architus_admin': int(member_id) in settings.admin_set,
             'permissions': member.guild_permissions.value,
         })
         return g
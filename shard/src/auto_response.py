@@ -1,18 +1,28 @@
 import string
-from contextlib import suppress
-from typing import Optional, Tuple
+from contextlib import suppress, asynccontextmanager
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from random import choice
-from asyncio import sleep
-import json
+from asyncio import sleep, shield, create_task, current_task
+from collections import Counter, OrderedDict, defaultdict
 
 from discord import Message, Guild, Member, AllowedMentions
 
 from src.emoji_manager import EmojiManager
-from lib.reggy.reggy import Reggy
-from lib.response_grammar.response import parse as parse_response, NodeType
-from lib.config import logger
+from src.word_store import word_store
+from src.response_renderer import compile_plan, MemberSampler, CHOICE, REACT, NOUN, ADJ, ADV, COUNT, MEMBER, \
+    AUTHOR, CAPTURE, URL, EVAL
+from lib.reggy.reggy import Reggy, FSM_FORMAT_VERSION, regex_hash
+from lib.reggy.fsm import Budget, unspecified
+from lib.reggy.cache import ReggyCache, ReggyHandle
+import re2 as re
+from lib.response_grammar.response import parse as parse_response, dumps as dump_ast, loads as load_ast
+from lib.config import logger, RESPONSE_COUNT_FLUSH_INTERVAL, RESPONSE_COUNT_FLUSH_SIZE, RESPONSE_CACHE_GUILDS, \
+    REGGY_CACHE_SIZE
 from lib.aiomodels import TbAutoResponses
 from lib.ipc import sandbox_pb2 as message
+from src.trigger_compiler import BUDGET, ResponseMode, compile_trigger, determine_mode, extract_punctuation, \
+    generate_trigger_regex
 
 
 class DefaultUser:
@@ -29,32 +39,51 @@ class DefaultUser:
 
 
 class WordGen:
+    """random words from the word lists shared by the whole process"""
+
     def __init__(self):
-        with open("res/words/nouns.txt") as f:
-            self.nouns = list(set(noun.strip() for noun in f))
-        with open("res/words/adjectives.txt") as f:
-            self.adjs = list(set(adj.strip() for adj in f))
-        with open("res/words/adverbs.txt") as f:
-            self.advs = list(set(adv.strip() for adv in f))
+        store = word_store()
+        self.nouns = store.nouns
+        self.adjs = store.adjs
+        self.advs = store.advs
 
     @property
     def noun(self):
-        return choice(self.nouns)
+        return self.nouns.choice()
 
     @property
     def adj(self):
-        return choice(self.adjs)
+        return self.adjs.choice()
 
     @property
     def adv(self):
-        return choice(self.advs)
+        return self.advs.choice()
+
+
+# compiled triggers shared by every guild in this process
+compiled_triggers = ReggyCache(max_unused=REGGY_CACHE_SIZE)
+
 
+@lru_cache(maxsize=256)
+def punctuation_table(punctuation: str) -> dict:
+    """translation table deleting the given punctuation, shared by every response with the same profile"""
+    return str.maketrans('', '', punctuation)
 
-class ResponseMode:
 
-    REGEX = 'regex'
-    PUNCTUATED = 'punctuated'
-    NAIVE = 'naive'
+class NormalizedContent(dict):
+    """
+    The content of a single message normalized for each punctuation profile.
+    Each profile is computed the first time a response asks for it.
+    """
+
+    def __init__(self, content: str):
+        super().__init__()
+        self.content = content
+
+    def __missing__(self, profile: Optional[str]) -> str:
+        text = self.content if profile is None else self.content.translate(punctuation_table(profile))
+        self[profile] = text
+        return text
 
 
 class AutoResponse:
@@ -69,12 +98,14 @@ class AutoResponse:
         id: Optional[int] = None,
         trigger_regex: str = "",
         trigger_punctuation: Tuple[str, ...] = (),
-        response_ast: str = "",
+        response_ast: Optional[str] = "",
         mode: Optional[ResponseMode] = None,
         count: int = 0,
         reply: bool = False,
         word_gen: Optional[WordGen] = None,
-        emoji_manager: Optional[EmojiManager] = None
+        emoji_manager: Optional[EmojiManager] = None,
+        trigger_fsm: Optional[str] = None,
+        member_sampler: Optional[MemberSampler] = None
     ):
         self.bot = bot
         self.trigger = trigger
@@ -84,6 +115,7 @@ class AutoResponse:
         self.count = count
         self.reply = reply
         self.word_gen = word_gen
+        self.member_sampler = member_sampler if member_sampler is not None else MemberSampler()
         self.settings = self.bot.settings[self.bot.get_guild(guild_id)]
 
         if id is None:
@@ -96,11 +128,17 @@ class AutoResponse:
         else:
             self.mode = mode
 
-        if response_ast == "":
+        # missing, empty and undecodable asts are all reparsed and then stored again
+        self.response_ast_stale = not response_ast
+        if self.response_ast_stale:
             self.response_ast = self._parse_response()
+        elif isinstance(response_ast, str):
+            self.response_ast = self._load_response_ast(response_ast)
         else:
             self.response_ast = response_ast
 
+        self.render_plan = compile_plan(self.response_ast)
+
         if self.mode == ResponseMode.PUNCTUATED and trigger_punctuation == ():
             self.trigger_punctuation = self._extract_punctuation()
         else:
@@ -112,7 +150,10 @@ class AutoResponse:
             self.trigger_regex = trigger_regex
 
         self._emoji_manager = emoji_manager
-        self.trigger_reggy = Reggy(self.trigger_regex)
+        # responses with the same regex share one compiled trigger, a stored fsm is only loaded on a miss
+        self.trigger_fsm_stale = trigger_fsm is None
+        self._trigger_handle = compiled_triggers.acquire(
+            self.trigger_regex, lambda: self._load_trigger_reggy(trigger_fsm))
         self.not_trigger_punctuation = "".join([c for c in string.punctuation if c not in self.trigger_punctuation])
 
     @property
@@ -121,156 +162,174 @@ class AutoResponse:
             self._emoji_manager = self.bot.get_cog("Emoji Manager").managers[self.guild_id]
         return self._emoji_manager
 
+    @property
+    def trigger_reggy(self) -> Reggy:
+        return self._trigger_handle.reggy
+
+    def release(self) -> None:
+        """give up this response's hold on its compiled trigger, it still works afterwards"""
+        handle, self._trigger_handle = self._trigger_handle, ReggyHandle(self.trigger_regex, self.trigger_reggy)
+        compiled_triggers.release(handle)
+
+    def _load_trigger_reggy(self, trigger_fsm: Optional[str]) -> Reggy:
+        """use the stored automaton if there is one, otherwise compile the trigger from scratch"""
+        self.trigger_fsm_stale = True
+        if trigger_fsm is not None:
+            try:
+                reggy = Reggy.from_json(trigger_fsm)
+            except Exception:
+                logger.exception(f"couldn't load stored fsm for {self.id}, recompiling")
+            else:
+                if reggy.re == self.trigger_regex:
+                    self.trigger_fsm_stale = False
+                    return reggy
+        return Reggy(self.trigger_regex)
+
     def _parse_response(self):
         """parse the response into its ast"""
         return parse_response(self.response)
 
+    def _load_response_ast(self, response_ast: str):
+        """load a stored ast, falling back to parsing the response if it was stored in an older format"""
+        try:
+            return load_ast(response_ast)
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            logger.debug(f"couldn't load stored ast for {self.id}, reparsing")
+            self.response_ast_stale = True
+            return self._parse_response()
+
     def _extract_punctuation(self) -> Tuple[str, ...]:
-        return tuple(c for c in self.trigger if c in string.punctuation)
+        return extract_punctuation(self.trigger)
 
     def _determine_mode(self) -> ResponseMode:
         """determine the mode of an AutoResponse based on a trigger string"""
-        with suppress(IndexError):
-            if self.trigger[0] == '^' and self.trigger[-1] == '$':
-                return ResponseMode.REGEX
-
-        if any(c for c in self.trigger if c in string.punctuation):
-            return ResponseMode.PUNCTUATED
-
-        return ResponseMode.NAIVE
+        return determine_mode(self.trigger)
 
     def _generate_trigger_regex(self) -> str:
-        special_chars = ['\\', '.', '*', '+', '?', '[', ']', '(', ')', '|']
-        pattern = self.trigger.lower()
-
-        if self.mode == ResponseMode.REGEX:
-            pattern = pattern[1:-1]
-        elif self.mode == ResponseMode.PUNCTUATED:
-            for c in string.punctuation:
-                if c not in self.trigger_punctuation:
-                    pattern = pattern.replace(c, "")
-            for c in special_chars:
-                pattern = pattern.replace(c, f"\\{c}")
-        elif self.mode == ResponseMode.NAIVE:
-            for c in string.punctuation:
-                pattern = pattern.replace(c, "")
-            for c in special_chars:
-                pattern = pattern.replace(c, f"\\{c}")
-        else:
+        try:
+            return generate_trigger_regex(self.trigger, self.mode, self.trigger_punctuation)
+        except ValueError:
             raise AutoResponseException(f"Unsupported mode: {self.mode}")
 
-        return pattern
-
-        # fsm = FSM(self.trigger_regex)
-        # if any(fsm.intersects(FSM(other.trigger_regex)) for other in guild_responses):
-        # raise TriggerCollisionException
-
-    async def resolve_resp(self, node, match, msg, content=None, reacts=None):
-        if (node.type == NodeType.List):
-            await self.resolve_resp(choice(node.children), match, msg, content, reacts)
-        elif (node.type == NodeType.ListElement):
-            for c in node.children:
-                await self.resolve_resp(c, match, msg, content, reacts)
-        elif (node.type == NodeType.PlainText):
-            content.append(node.text)
-        elif (node.type == NodeType.React):
-            emoji = self.emoji_manager.find_emoji(node.id, node.id, node.shortcode)
-            if emoji:
-                logger.debug(f"found {emoji} in manager, making sure it's loaded")
-                await self.emoji_manager.load_emoji(emoji)
-                reacts.append(emoji.to_discord_str())
-            else:
-                reacts.append(node.shortcode)
-        elif (node.type == NodeType.Noun):
-            content.append(self.word_gen.noun)
-        elif (node.type == NodeType.Adj):
-            content.append(self.word_gen.adj)
-        elif (node.type == NodeType.Adv):
-            content.append(self.word_gen.adv)
-        elif (node.type == NodeType.Count):
-            content.append(str(self.count))
-        elif (node.type == NodeType.Member):
-            content.append(choice(msg.guild.members).display_name)
-        elif (node.type == NodeType.Author):
-            content.append(msg.author.display_name)
-        elif (node.type == NodeType.Capture):
-            with suppress(IndexError):
-                string = match.groups()[node.capture_group]
-                content.append(string if string is not None else "")
-
-        elif (node.type == NodeType.Url):
-            if self.settings.responses_allow_embeds:
-                content.append(node.text)
-            else:
-                content.append(f"<{node.text}>")
-        elif (node.type == NodeType.Eval):
-            sauthor = msg.guild.get_member(self.author_id)
-            if sauthor is None:
-                sauthor = DefaultUser()
-            output = await self.bot.sandbox_client.RunStarlarkScript(
-                message.StarlarkScript(
-                    script=node.text,
-                    trigger_message=message.Message(
-                        clean=msg.clean_content,
-                        content=msg.content,
-                        id=msg.id
-                    ),
-                    message_author=message.Author(
-                        id=msg.author.id,
-                        avatar_url=str(msg.author.avatar_url),
-                        color=str(msg.author.color),
-                        discriminator=int(msg.author.discriminator),
-                        roles=[r.id for r in msg.author.roles],
-                        name=msg.author.name,
-                        nick="" if msg.author.nick is None else msg.author.nick,
-                        disp_name=msg.author.display_name,
-                        permissions=msg.author.guild_permissions.value
-                    ),
-                    script_author=message.Author(
-                        id=sauthor.id,
-                        avatar_url=str(sauthor.avatar_url),
-                        color=str(sauthor.color),
-                        discriminator=int(sauthor.discriminator),
-                        roles=[r.id for r in sauthor.roles],
-                        name=sauthor.name,
-                        nick="" if sauthor.nick is None else sauthor.nick,
-                        disp_name=sauthor.display_name,
-                        permissions=sauthor.guild_permissions.value
-                    ),
-                    count=self.count,
-                    captures=list(match.groups()),
-                    arguments=[],
-                    channel=message.Channel(
-                        id=msg.channel.id,
-                        name=msg.channel.name
-                    )
-                ))
-            if output.errno != 0:
-                content.append(f"{output.errno} : {output.error}")
-            else:
-                content.append(output.output)
-        else:
-            content = []
-            reacts = []
-            for c in node.children:
-                await self.resolve_resp(c, match, msg, content, reacts)
-            return content, reacts
-
-    async def execute(self, msg: Message, overtaken) -> Optional[Message]:
-        content = msg.content
+    def _render(self, steps, match, msg, content: List[str], reacts: list, evals: list) -> None:
+        """render the steps of a plan into content, leaving a slot in it for each eval"""
+        for step in steps:
+            if type(step) is str:
+                content.append(step)
+                continue
+            kind, arg = step
+            if kind == CHOICE:
+                self._render(choice(arg), match, msg, content, reacts, evals)
+            elif kind == NOUN:
+                content.append(self.word_gen.noun)
+            elif kind == ADJ:
+                content.append(self.word_gen.adj)
+            elif kind == ADV:
+                content.append(self.word_gen.adv)
+            elif kind == COUNT:
+                content.append(str(self.count))
+            elif kind == MEMBER:
+                member = self.member_sampler.sample(msg.guild)
+                content.append(member.display_name if member is not None else "")
+            elif kind == AUTHOR:
+                content.append(msg.author.display_name)
+            elif kind == CAPTURE:
+                with suppress(IndexError):
+                    string = match.groups()[arg]
+                    content.append(string if string is not None else "")
+            elif kind == URL:
+                content.append(arg if self.settings.responses_allow_embeds else f"<{arg}>")
+            elif kind == REACT:
+                reacts.append(arg)
+            elif kind == EVAL:
+                evals.append((len(content), arg))
+                content.append("")
+
+    async def render(self, match, msg) -> Tuple[str, List[str]]:
+        """the content of the response and the emojis to react with"""
+        plan = self.render_plan
+        if plan.text is not None:
+            return plan.text, []
+        content, reacts, evals = [], [], []
+        self._render(plan.steps, match, msg, content, reacts, evals)
+        for i, script in evals:
+            content[i] = await self._run_eval(script, match, msg)
+        return "".join(content), [await self._resolve_react(id, shortcode) for id, shortcode in reacts]
+
+    async def _resolve_react(self, id, shortcode: str) -> str:
+        emoji = self.emoji_manager.find_emoji(id, id, shortcode)
+        if emoji:
+            logger.debug(f"found {emoji} in manager, making sure it's loaded")
+            await self.emoji_manager.load_emoji(emoji)
+            return emoji.to_discord_str()
+        return shortcode
+
+    async def _run_eval(self, script: str, match, msg) -> str:
+        sauthor = msg.guild.get_member(self.author_id)
+        if sauthor is None:
+            sauthor = DefaultUser()
+        output = await self.bot.sandbox_client.RunStarlarkScript(
+            message.StarlarkScript(
+                script=script,
+                trigger_message=message.Message(
+                    clean=msg.clean_content,
+                    content=msg.content,
+                    id=msg.id
+                ),
+                message_author=message.Author(
+                    id=msg.author.id,
+                    avatar_url=str(msg.author.avatar_url),
+                    color=str(msg.author.color),
+                    discriminator=int(msg.author.discriminator),
+                    roles=[r.id for r in msg.author.roles],
+                    name=msg.author.name,
+                    nick="" if msg.author.nick is None else msg.author.nick,
+                    disp_name=msg.author.display_name,
+                    permissions=msg.author.guild_permissions.value
+                ),
+                script_author=message.Author(
+                    id=sauthor.id,
+                    avatar_url=str(sauthor.avatar_url),
+                    color=str(sauthor.color),
+                    discriminator=int(sauthor.discriminator),
+                    roles=[r.id for r in sauthor.roles],
+                    name=sauthor.name,
+                    nick="" if sauthor.nick is None else sauthor.nick,
+                    disp_name=sauthor.display_name,
+                    permissions=sauthor.guild_permissions.value
+                ),
+                count=self.count,
+                captures=list(match.groups()),
+                arguments=[],
+                channel=message.Channel(
+                    id=msg.channel.id,
+                    name=msg.channel.name
+                )
+            ))
+        if output.errno != 0:
+            return f"{output.errno} : {output.error}"
+        return output.output
 
+    @property
+    def punctuation_profile(self) -> Optional[str]:
+        """the punctuation stripped from messages before matching, or None if they're matched as is"""
         if self.mode == ResponseMode.REGEX:
-            pass
-        else:
-            content = content.translate(str.maketrans('', '', self.not_trigger_punctuation))
-
-        match = self.trigger_reggy.matches(content)
+            return None
+        return self.not_trigger_punctuation
+
+    async def execute(
+            self, msg: Message, overtaken, normalized: Optional[NormalizedContent] = None) -> Optional[Message]:
+        if normalized is None:
+            normalized = NormalizedContent(msg.content)
+        match = self.trigger_reggy.matches(normalized[self.punctuation_profile])
         if match is None:
             return
+        return await self.respond(msg, match, overtaken)
 
+    async def respond(self, msg: Message, match, overtaken) -> Optional[Message]:
+        """send the response for a message that is already known to match the trigger"""
         self.count += 1
-        content, reacts = await self.resolve_resp(self.response_ast, match, msg)
-        content = "".join(content)
+        content, reacts = await self.render(match, msg)
 
         if not self.settings.responses_allow_newlines:
             content = content.translate(str.maketrans('', '', '\n\r'))
@@ -317,17 +376,309 @@ class AutoResponse:
         }
 
 
+class TriggerChunk:
+    """
+    A run of auto responses sharing a punctuation profile, compiled into a single
+    alternation so that one RE2 pass finds the first of them that matches.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self._pattern = None
+        self._groups = ()
+
+    def invalidate(self) -> None:
+        self._pattern = None
+
+    def _compile(self) -> None:
+        groups = []
+        alternatives = []
+        group = 1
+        for r in self.responses:
+            groups.append((group, r))
+            alternatives.append(f"({r.trigger_regex})")
+            group += 1 + r.trigger_reggy.pattern.groups
+        self._groups = tuple(groups)
+        try:
+            self._pattern = re.compile(f"(?i)(?:{'|'.join(alternatives)})")
+        except Exception:
+            logger.exception(f"couldn't combine {len(self.responses)} triggers, matching them one at a time")
+            self._pattern = False
+
+    def first_match(self, content: str):
+        """find the first response in this chunk matching the content along with its match object"""
+        if self._pattern is None:
+            self._compile()
+
+        if self._pattern is False:
+            for r in self.responses:
+                match = r.trigger_reggy.matches(content)
+                if match is not None:
+                    return r, match
+            return None
+
+        combined = self._pattern.fullmatch(content)
+        if combined is None:
+            return None
+        for group, r in self._groups:
+            if combined.group(group) is not None:
+                # run the response's own pattern so capture groups are numbered as the user wrote them
+                return r, r.trigger_reggy.matches(content)
+        return None
+
+
+class TriggerMatcher:
+    """
+    Finds the first auto response of a guild that matches a message.
+
+    Responses are grouped by punctuation profile, since those sharing a profile see the same
+    normalized message, and each group is split into chunks of combined patterns. Adding or
+    removing a response only recompiles the chunk it lives in.
+    """
+
+    CHUNK_SIZE = 64
+
+    def __init__(self, responses=()):
+        self._profiles = {}
+        self._order = {}
+        self._next = 0
+        for r in responses:
+            self.add(r)
+
+    def add(self, response: AutoResponse) -> None:
+        chunks = self._profiles.setdefault(response.punctuation_profile, [])
+        if not chunks or len(chunks[-1].responses) >= self.CHUNK_SIZE:
+            chunks.append(TriggerChunk())
+        chunks[-1].responses.append(response)
+        chunks[-1].invalidate()
+        self._order[response.id] = self._next
+        self._next += 1
+
+    def remove(self, response: AutoResponse) -> None:
+        chunks = self._profiles.get(response.punctuation_profile, [])
+        for chunk in chunks:
+            if response in chunk.responses:
+                chunk.responses.remove(response)
+                chunk.invalidate()
+                if not chunk.responses:
+                    chunks.remove(chunk)
+                break
+        if not chunks:
+            self._profiles.pop(response.punctuation_profile, None)
+        self._order.pop(response.id, None)
+
+    def first_match(self, normalized: NormalizedContent):
+        """returns the earliest added response matching the message and its match, or None"""
+        best = None
+        for profile, chunks in self._profiles.items():
+            content = normalized[profile]
+            for chunk in chunks:
+                found = chunk.first_match(content)
+                if found is not None:
+                    if best is None or self._order[found[0].id] < self._order[best[0].id]:
+                        best = found
+                    break
+        return best
+
+
+class TriggerSummary:
+    """Cheap facts about a trigger's automaton used to rule out collisions without intersecting FSMs."""
+
+    def __init__(self, reggy: Reggy):
+        self.reggy = reggy
+        self.alphabet = reggy.fsm.alphabet
+        self.first = reggy.fsm.first_symbols()
+        self.accepts_empty = reggy.fsm.initial in reggy.fsm.accepting
+        self.shortest, self.longest = reggy.fsm.length_bounds()
+        self.literal = reggy.fsm.single_string()
+
+    def _first_overlaps(self, other: 'TriggerSummary') -> bool:
+        if self.first & other.first - {unspecified}:
+            return True
+        if unspecified in self.first:
+            if unspecified in other.first or any(c not in self.alphabet for c in other.first if c is not unspecified):
+                return True
+        if unspecified in other.first:
+            return any(c not in other.alphabet for c in self.first if c is not unspecified)
+        return False
+
+    def maybe_overlaps(self, other: 'TriggerSummary') -> Optional[bool]:
+        """True or False if the prefilters can decide, None if the automata have to be intersected"""
+        if self.shortest is None or other.shortest is None:
+            return False
+        if self.accepts_empty and other.accepts_empty:
+            return True
+        if self.longest is not None and self.longest < other.shortest:
+            return False
+        if other.longest is not None and other.longest < self.shortest:
+            return False
+        if self.literal is not None and other.literal is not None:
+            return self.literal == other.literal
+        if self.literal is not None:
+            return other.reggy.fsm.accepts(self.literal)
+        if other.literal is not None:
+            return self.reggy.fsm.accepts(other.literal)
+        if not self._first_overlaps(other):
+            return False
+        return None
+
+
+class CollisionIndex:
+    """
+    Finds the responses of a guild whose triggers could match the same message as a new trigger.
+
+    Existing triggers are bucketed by the symbols their accepted strings can start with, and each
+    candidate pair goes through the TriggerSummary prefilters before falling back to an exact FSM
+    check. Exact answers are cached for the whole process, keyed by the pair of regexes.
+    """
+
+    CACHE_SIZE = 10000
+    _pair_cache = OrderedDict()
+
+    def __init__(self, responses=()):
+        self._summaries = {}
+        self._order = {}
+        self._next = 0
+        self._by_first = defaultdict(set)
+        self._wildcard = set()
+        self._empty = set()
+        for r in responses:
+            self.add(r)
+
+    def add(self, response: AutoResponse) -> None:
+        summary = TriggerSummary(response.trigger_reggy)
+        self._summaries[response.id] = (response, summary)
+        self._order[response.id] = self._next
+        self._next += 1
+        for symbol in summary.first:
+            if symbol is unspecified:
+                self._wildcard.add(response.id)
+            else:
+                self._by_first[symbol].add(response.id)
+        if summary.accepts_empty:
+            self._empty.add(response.id)
+
+    def remove(self, response: AutoResponse) -> None:
+        _, summary = self._summaries.pop(response.id, (None, None))
+        if summary is None:
+            return
+        del self._order[response.id]
+        for symbol in summary.first:
+            bucket = self._wildcard if symbol is unspecified else self._by_first[symbol]
+            bucket.discard(response.id)
+            if not bucket and symbol is not unspecified:
+                del self._by_first[symbol]
+        self._empty.discard(response.id)
+
+    def _candidates(self, summary: TriggerSummary):
+        if unspecified in summary.first:
+            ids = set(self._summaries)
+        else:
+            ids = set(self._wildcard)
+            for symbol in summary.first:
+                ids.update(self._by_first.get(symbol, ()))
+            if summary.accepts_empty:
+                ids.update(self._empty)
+        for id in sorted(ids, key=self._order.__getitem__):
+            yield self._summaries[id]
+
+    @classmethod
+    def _overlaps(cls, a: TriggerSummary, b: TriggerSummary) -> bool:
+        decided = a.maybe_overlaps(b)
+        if decided is not None:
+            return decided
+        key = (a.reggy.re, b.reggy.re) if a.reggy.re <= b.reggy.re else (b.reggy.re, a.reggy.re)
+        try:
+            overlaps = cls._pair_cache[key]
+        except KeyError:
+            overlaps = not a.reggy.isdisjoint(b.reggy)
+            cls._pair_cache[key] = overlaps
+            if len(cls._pair_cache) > cls.CACHE_SIZE:
+                cls._pair_cache.popitem(last=False)
+        else:
+            cls._pair_cache.move_to_end(key)
+        return overlaps
+
+    def _conflicts(self, reggy: Reggy):
+        summary = TriggerSummary(reggy)
+        for other, other_summary in self._candidates(summary):
+            if self._overlaps(summary, other_summary):
+                yield other
+
+    def conflicts(self, reggy: Reggy) -> List[AutoResponse]:
+        """every response whose trigger collides with the given one, in the order they were added"""
+        return list(self._conflicts(reggy))
+
+    def example(self, reggy: Reggy, response: AutoResponse) -> Optional[str]:
+        """a message both the given trigger and the response's trigger would match"""
+        return reggy.overlap_example(response.trigger_reggy)
+
+    def collides(self, reggy: Reggy) -> bool:
+        """whether any response collides with the given trigger, stopping at the first conflict"""
+        return next(self._conflicts(reggy), None) is not None
+
+
+class HitCounter:
+    """
+    Buffers auto response hits in memory and writes the accumulated deltas in a single statement,
+    either `interval` seconds after the first unwritten hit or once `max_pending` responses are waiting.
+    The live count is always the one on the AutoResponse itself.
+    """
+
+    def __init__(self, bot, interval=RESPONSE_COUNT_FLUSH_INTERVAL, max_pending=RESPONSE_COUNT_FLUSH_SIZE):
+        self.bot = bot
+        self.interval = interval
+        self.max_pending = max_pending
+        self.tb_auto_responses = TbAutoResponses(self.bot.asyncpg_wrapper)
+        self.pending = Counter()
+        self._timer = None
+
+    def hit(self, resp: AutoResponse) -> None:
+        self.pending[resp.id] += 1
+        if len(self.pending) >= self.max_pending:
+            self.bot.loop.create_task(self.flush())
+        elif self._timer is None:
+            self._timer = self.bot.loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await sleep(self.interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, Counter()
+        try:
+            await self.tb_auto_responses.increment_counts(pending.items())
+        except Exception:
+            logger.exception(f"couldn't write counts for {len(pending)} auto responses, retrying later")
+            self.pending.update(pending)
+            if self._timer is None:
+                self._timer = self.bot.loop.create_task(self._flush_later())
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
 class GuildAutoResponses:
 
-    def __init__(self, bot, guild, executor, no_db=False):
+    def __init__(self, bot, guild, executor, no_db=False, hit_counter=None, compiler=None):
         self.guild = guild
         self.bot = bot
         self.executor = executor
         self.tb_auto_responses = TbAutoResponses(self.bot.asyncpg_wrapper)
         self.settings = self.bot.settings[guild]
         self.auto_responses = []
+        self.matcher = TriggerMatcher()
+        self.collisions = CollisionIndex()
         self.word_gen = WordGen()
+        self.members = MemberSampler()
         self.no_db = no_db
+        self.hit_counter = hit_counter
+        self.compiler = compiler
 
     @classmethod
     async def new(cls, *args, **kwargs):
@@ -339,12 +690,30 @@ class GuildAutoResponses:
     def aiosession(self):
         return self.bot.aiosession
 
+    async def _compile(
+            self, trigger: str, mode: Optional[str] = None, trigger_punctuation: Tuple[str, ...] = (),
+            trigger_regex: str = "", budget: Optional[Budget] = None) -> Tuple[str, Tuple[str, ...], str, str]:
+        """compile a trigger on the process pool if there is one, otherwise on our executor"""
+        if self.compiler is not None:
+            return await self.compiler.compile(trigger, mode, trigger_punctuation, trigger_regex, budget)
+        return await self.bot.loop.run_in_executor(
+            self.executor, compile_trigger, trigger, mode, trigger_punctuation, trigger_regex, budget)
+
     async def _init_from_db(self) -> None:
         if self.no_db:
             return
 
+        stale = []
         for r in await self.tb_auto_responses.select_by_guild(self.guild.id):
+            trigger_fsm = None
+            if r['trigger_fsm_version'] == FSM_FORMAT_VERSION:
+                if r['trigger_fsm_hash'] == regex_hash(r['trigger_regex']):
+                    trigger_fsm = r['trigger_fsm']
+            fsm_stale = trigger_fsm is None
             try:
+                if fsm_stale and r['trigger_regex'] not in compiled_triggers:
+                    *_, trigger_fsm = await self._compile(
+                        r['trigger'], r['mode'], r['trigger_punctuation'], r['trigger_regex'])
                 args = (
                     self.bot,
                     r['trigger'],
@@ -354,17 +723,36 @@ class GuildAutoResponses:
                     r['id'],
                     r['trigger_regex'],
                     r['trigger_punctuation'],
-                    "",
+                    r['response_ast'],
                     r['mode'],
                     r['count'],
                     r['reply'],
                     self.word_gen,
-                    None)  # TODO
+                    None,  # TODO
+                    trigger_fsm,
+                    self.members)
                 resp = await self.bot.loop.run_in_executor(self.executor, AutoResponse, *args)
             except Exception:
                 logger.exception("")
             else:
                 self.auto_responses.append(resp)
+                self.matcher.add(resp)
+                self.collisions.add(resp)
+                if fsm_stale or resp.trigger_fsm_stale or resp.response_ast_stale:
+                    stale.append(resp)
+
+        if stale:
+            logger.debug(f"storing {len(stale)} recompiled responses for {self.guild.id}")
+            try:
+                await self.tb_auto_responses.update_compiled([(
+                    r.id,
+                    dump_ast(r.response_ast),
+                    r.trigger_reggy.to_json(),
+                    FSM_FORMAT_VERSION,
+                    regex_hash(r.trigger_regex)
+                ) for r in stale])
+            except Exception:
+                logger.exception(f"couldn't store compiled responses for {self.guild.id}")
 
     async def _insert_into_db(self, resp: AutoResponse) -> None:
         if self.no_db:
@@ -377,10 +765,13 @@ class GuildAutoResponses:
             'guild_id': resp.guild_id,
             'trigger_regex': resp.trigger_regex,
             'trigger_punctuation': resp.trigger_punctuation,
-            'response_ast': json.dumps(resp.response_ast.stringify()),
+            'response_ast': dump_ast(resp.response_ast),
             'mode': resp.mode,
             'count': resp.count,
             'reply': resp.reply,
+            'trigger_fsm': resp.trigger_reggy.to_json(),
+            'trigger_fsm_version': FSM_FORMAT_VERSION,
+            'trigger_fsm_hash': regex_hash(resp.trigger_regex),
         })
 
     async def _delete_from_db(self, resp: AutoResponse) -> None:
@@ -391,16 +782,32 @@ class GuildAutoResponses:
     async def _update_resp_db(self, resp: AutoResponse) -> None:
         if self.no_db:
             return
-        await self.tb_auto_responses.update_by_id({'count': resp.count}, resp.id)
+        if self.hit_counter is not None:
+            self.hit_counter.hit(resp)
+        else:
+            await self.tb_auto_responses.update_by_id({'count': resp.count}, resp.id)
 
     async def execute(self, msg, overtaken=None) -> Tuple[Optional[Message], Optional[AutoResponse]]:
         if msg.author.bot:
             return None, None
-        for r in self.auto_responses:
-            resp_msg = await r.execute(msg, overtaken)
-            if resp_msg is not None:
-                await self._update_resp_db(r)
-                return resp_msg, r
+        normalized = NormalizedContent(msg.content)
+        found = self.matcher.first_match(normalized)
+        if found is None:
+            return None, None
+
+        r, match = found
+        resp_msg = await r.respond(msg, match, overtaken)
+        if resp_msg is not None:
+            await self._update_resp_db(r)
+            return resp_msg, r
+
+        # responses that only react don't stop the ones after them from firing
+        with suppress(ValueError):
+            for r in self.auto_responses[self.auto_responses.index(r) + 1:]:
+                resp_msg = await r.execute(msg, overtaken, normalized)
+                if resp_msg is not None:
+                    await self._update_resp_db(r)
+                    return resp_msg, r
         return None, None
 
     async def new_response(
@@ -410,6 +817,7 @@ class GuildAutoResponses:
             manager = None
         else:
             manager = self.bot.get_cog("Emoji Manager").managers[guild.id]
+        mode, trigger_punctuation, trigger_regex, trigger_fsm = await self._compile(trigger.strip(), budget=BUDGET)
         r = await self.bot.loop.run_in_executor(
             self.executor, AutoResponse,
             self.bot,
@@ -418,17 +826,25 @@ class GuildAutoResponses:
             author.id,
             guild.id,
             None,
+            trigger_regex,
+            trigger_punctuation,
             "",
-            (),
-            "",
-            None,
+            mode,
             0,
             reply,
             self.word_gen,
-            manager)
-
-        self.validate(r)
+            manager,
+            trigger_fsm,
+            self.members)
+
+        try:
+            self.validate(r)
+        except AutoResponseException:
+            r.release()
+            raise
         self.auto_responses.append(r)
+        self.matcher.add(r)
+        self.collisions.add(r)
         await self._insert_into_db(r)
         return r
 
@@ -436,16 +852,24 @@ class GuildAutoResponses:
         """helper method for removing guild-specific auto response"""
         for r in self.auto_responses:
             if r.trigger == trigger:
-                admin = author.id in self.settings.admin_ids
+                admin = author.id in self.settings.admin_set
                 if not admin and self.settings.responses_only_author_remove and r.author_id != author.id:
                     raise PermissionException(r.author_id)
                 self.auto_responses.remove(r)
+                self.matcher.remove(r)
+                self.collisions.remove(r)
+                r.release()
                 await self._delete_from_db(r)
                 return r
         raise UnknownResponseException
 
+    def release(self) -> None:
+        """release the compiled triggers of every response, for when the guild is unloaded"""
+        for r in self.auto_responses:
+            r.release()
+
     def validate(self, response: AutoResponse) -> None:
-        admin = response.author_id in self.settings.admin_ids
+        admin = response.author_id in self.settings.admin_set
         if not self.settings.responses_enabled:
             raise DisabledException("auto responses")
         if response.mode == ResponseMode.REGEX and not (self.settings.responses_allow_regex or admin):
@@ -465,19 +889,120 @@ class GuildAutoResponses:
         if not self.settings.responses_allow_collision:
             conflicts = self.is_disjoint(response)
             if conflicts:
-                raise TriggerCollisionException(conflicts)
+                raise TriggerCollisionException(
+                    conflicts, self.collisions.example(response.trigger_reggy, conflicts[0]))
         else:
             for r in self.auto_responses:
                 if r.trigger == response.trigger:
                     raise TriggerCollisionException((r,))
 
-    def is_disjoint(self, response: AutoResponse) -> bool:
-        # all(r.trigger_reggy.isdisjoint(response.trigger_reggy) for r in self.auto_responses)
-        conflicts = []
-        for r in self.auto_responses:
-            if not r.trigger_reggy.isdisjoint(response.trigger_reggy):
-                conflicts.append(r)
-        return conflicts
+    def is_disjoint(self, response: AutoResponse) -> List[AutoResponse]:
+        return self.collisions.conflicts(response.trigger_reggy)
+
+
+class GuildResponseCache:
+    """
+    The auto responses of each guild, loaded the first time they're needed and kept in LRU order.
+
+    Once more than `max_guilds` are loaded, the least recently used guilds that aren't in use are
+    dropped. Guilds that are still loading are never evicted, and everyone asking for a guild
+    while it loads waits on the same load.
+    """
+
+    def __init__(self, load, max_guilds: int = RESPONSE_CACHE_GUILDS):
+        self._load = load
+        self.max_guilds = max_guilds
+        self._loaded = OrderedDict()
+        self._loading = {}
+        self._in_use = Counter()
+        self._fixed = {}
+
+    def __getitem__(self, guild_id: int) -> 'GuildAutoResponses':
+        """an already loaded guild, raises KeyError instead of loading"""
+        with suppress(KeyError):
+            return self._fixed[guild_id]
+        responses = self._loaded[guild_id]
+        self._loaded.move_to_end(guild_id)
+        return responses
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._fixed or guild_id in self._loaded
+
+    def setdefault(self, guild_id: int, responses: 'GuildAutoResponses') -> 'GuildAutoResponses':
+        """register responses that aren't backed by the database, these are never evicted"""
+        return self._fixed.setdefault(guild_id, responses)
+
+    def state(self, guild_id: int) -> str:
+        """'loaded', 'loading' or 'unloaded'"""
+        if guild_id in self:
+            return 'loaded'
+        if guild_id in self._loading:
+            return 'loading'
+        return 'unloaded'
+
+    def _load_task(self, guild: Guild):
+        task = self._loading.get(guild.id)
+        if task is None:
+            task = self._loading[guild.id] = create_task(self._load_guild(guild))
+        return task
+
+    async def get(self, guild: Guild) -> 'GuildAutoResponses':
+        with suppress(KeyError):
+            return self[guild.id]
+        return await shield(self._load_task(guild))
+
+    def load_later(self, guild: Guild) -> None:
+        """start loading a guild's responses without waiting for them"""
+        if guild.id not in self:
+            self._load_task(guild).add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("couldn't load auto responses", exc_info=task.exception())
+
+    async def _load_guild(self, guild: Guild) -> 'GuildAutoResponses':
+        task = current_task()
+        try:
+            responses = await self._load(guild)
+        finally:
+            # the guild was dropped while it loaded if this is no longer its load
+            dropped = self._loading.get(guild.id) is not task
+            if not dropped:
+                del self._loading[guild.id]
+        if dropped:
+            responses.release()
+            return responses
+        self._loaded[guild.id] = responses
+        self._evict()
+        return responses
+
+    def _evict(self) -> None:
+        excess = len(self._loaded) - self.max_guilds
+        for guild_id in list(self._loaded):
+            if excess <= 0:
+                break
+            if self._in_use[guild_id] == 0:
+                self._loaded.pop(guild_id).release()
+                excess -= 1
+
+    def drop(self, guild_id: int) -> None:
+        """unload a guild, a load still in progress finishes without keeping its responses"""
+        self._loading.pop(guild_id, None)
+        responses = self._loaded.pop(guild_id, None)
+        if responses is not None:
+            responses.release()
+
+    @asynccontextmanager
+    async def use(self, guild: Guild):
+        """load a guild's responses and keep them from being evicted until the block exits"""
+        self._in_use[guild.id] += 1
+        try:
+            yield await self.get(guild)
+        finally:
+            self._in_use[guild.id] -= 1
+            if self._in_use[guild.id] <= 0:
+                del self._in_use[guild.id]
 
 
 class AutoResponseException(Exception):
@@ -510,5 +1035,6 @@ class UnknownResponseException(AutoResponseException):
 
 
 class TriggerCollisionException(AutoResponseException):
-    def __init__(self, conflicts):
+    def __init__(self, conflicts, example=None):
         self.conflicts = conflicts
+        self.example = example
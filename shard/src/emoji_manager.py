@@ -444,7 +444,7 @@ class EmojiManagerCog(commands.Cog, name="Emoji Manager"):
     async def emojilo(self, ctx):
         """display the elo of each emoji in the guild"""
         settings = self.bot.settings[ctx.guild]
-        if settings.bot_commands_channels and ctx.channel.id not in settings.bot_commands_channels:
+        if settings.bot_commands_channels and ctx.channel.id not in settings.bot_commands_set:
             await ctx.send(f"Please use <#{settings.bot_commands_channels[0]}>")
             return
         manager = self.managers[ctx.guild.id]
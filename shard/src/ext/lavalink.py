@@ -84,7 +84,7 @@ class LavaMusic(commands.Cog, name="Voice"):
             raise commands.CommandInvokeError('')
 
         if settings.music_role and settings.music_role not in user.roles \
-                and user.id not in settings.admin_ids:
+                and user.id not in settings.admin_set:
             raise commands.CommandInvokeError('must be part of the music role')
 
         if not user.voice or not user.voice.channel:
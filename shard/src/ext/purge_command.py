@@ -55,7 +55,7 @@ async def id(ctx, mid, inclusive=False):
         return
 
     settings = ctx.bot.settings[ctx.guild]
-    if ctx.author.id not in settings.admins_ids:
+    if ctx.author.id not in settings.admin_set:
         await ctx.send("You do not have permissions to purge messaages")
         return
 
@@ -138,7 +138,7 @@ async def time(ctx, time_window: str, user: discord.Member = None):
         return
 
     settings = ctx.bot.settings[ctx.guild]
-    if ctx.author.id not in settings.admins_ids:
+    if ctx.author.id not in settings.admin_set:
         await ctx.send("You do not have permissions to purge messaages")
         return
 
@@ -1,8 +1,10 @@
 from discord.ext import commands
-from src.auto_response import GuildAutoResponses, TriggerCollisionException, LongResponseException,\
-    ShortTriggerException, UserLimitException, UnknownResponseException, DisabledException, PermissionException
+from src.auto_response import GuildAutoResponses, GuildResponseCache, HitCounter, TriggerCollisionException, \
+    LongResponseException, ShortTriggerException, UserLimitException, UnknownResponseException, DisabledException, \
+    PermissionException
 from lib.response_grammar.response import ParseError
-from lib.reggy.reggy import NotParseable
+from lib.reggy.reggy import NotParseable, TooComplex
+from src.trigger_compiler import TriggerCompiler
 from src.utils import bot_commands_only, doc_url
 from lib.config import logger
 
@@ -22,31 +24,52 @@ class AutoResponseCog(commands.Cog, name="Auto Responses"):
 
     def __init__(self, bot):
         self.bot = bot
-        self.responses = {}
+        self.responses = GuildResponseCache(self._load_guild)
         self.response_msgs = {}
         self.react_msgs = {}
         self.executor = ThreadPoolExecutor(max_workers=5)
+        self.hit_counter = HitCounter(bot)
+        self.compiler = TriggerCompiler(bot.loop, fallback_executor=self.executor)
         self.last_overtaken_ptrs = defaultdict(MsgOvertaken)
 
-    @commands.Cog.listener()
-    async def on_ready(self):
-        self.responses = {g.id: await GuildAutoResponses.new(self.bot, g, self.executor) for g in self.bot.guilds}
-        logger.debug("auto responses initialized")
+    def cog_unload(self):
+        self.hit_counter.cancel()
+        self.bot.loop.create_task(self.hit_counter.flush())
+        self.compiler.shutdown()
+
+    async def flush(self):
+        """write any buffered response counts, called when the bot shuts down"""
+        await self.hit_counter.flush()
+
+    async def _load_guild(self, guild):
+        logger.debug(f"loading auto responses for {guild.id}")
+        return await GuildAutoResponses.new(
+            self.bot, guild, self.executor, hit_counter=self.hit_counter, compiler=self.compiler)
 
     @commands.Cog.listener()
     async def on_message(self, msg):
         if not self.bot.settings[msg.channel.guild].responses_enabled:
             return
         self.last_overtaken_ptrs[msg.guild.id].overtaken = True
-        with suppress(KeyError):
-            self.last_overtaken_ptrs[msg.guild.id] = MsgOvertaken(False)
-            resp_msg, response = await self.responses[msg.guild.id].execute(msg, self.last_overtaken_ptrs[msg.guild.id])
-            if resp_msg is not None:
-                self.response_msgs[resp_msg.id] = response
+        self.last_overtaken_ptrs[msg.guild.id] = MsgOvertaken(False)
+        async with self.responses.use(msg.guild) as responses:
+            resp_msg, response = await responses.execute(msg, self.last_overtaken_ptrs[msg.guild.id])
+        if resp_msg is not None:
+            self.response_msgs[resp_msg.id] = response
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.responses.drop(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if member.guild.id in self.responses:
+            self.responses[member.guild.id].members.add(member.id)
 
     @commands.Cog.listener()
-    async def on_guild_join(self, guild):
-        self.responses[guild.id] = await GuildAutoResponses.new(self.bot, guild, self.executor)
+    async def on_member_remove(self, member):
+        if member.guild.id in self.responses:
+            self.responses[member.guild.id].members.remove(member.id)
 
     @commands.Cog.listener()
     async def on_reaction_add(self, react, user):
@@ -66,7 +89,8 @@ class AutoResponseCog(commands.Cog, name="Auto Responses"):
             with suppress(KeyError):
                 resp = self.react_msgs[msg.id]
                 try:
-                    await self.responses[resp.guild_id].remove(resp.trigger, user)
+                    async with self.responses.use(msg.guild) as responses:
+                        await responses.remove(resp.trigger, user)
                 except PermissionException as e:
                     member = msg.guild.get_member(e.author_id)
                     whom = f"{member.display_name} or an admin" if member else "an admin"
@@ -95,7 +119,8 @@ class AutoResponseCog(commands.Cog, name="Auto Responses"):
 
     async def _remove(self, guild, trigger, author):
         try:
-            resp = await self.responses[guild.id].remove(trigger, author)
+            async with self.responses.use(guild) as responses:
+                resp = await responses.remove(trigger, author)
         except PermissionException as e:
             member = guild.get_member(e.author_id)
             whom = f"{member.display_name} or an admin" if member else "an admin"
@@ -153,12 +178,15 @@ class AutoResponseCog(commands.Cog, name="Auto Responses"):
     async def new_response(self, trigger, response, guild, author, reply):
         settings = await self.bot.settings.aio[guild]
         try:
-            resp = await self.responses[guild.id].new_response(trigger, response, guild, author, reply)
+            async with self.responses.use(guild) as responses:
+                resp = await responses.new_response(trigger, response, guild, author, reply)
         except TriggerCollisionException as e:
             msg = "❌ sorry that trigger collides with the following auto responses:\n"
             msg += '\n'.join([f"`{r}`" for r in e.conflicts[:4]])
             if len(e.conflicts) > 4:
                 msg += f"\n_...{len(e.conflicts) - 4} more not shown_"
+            if e.example and '`' not in e.example:
+                msg += f"\nfor example, they would both respond to `{e.example}`"
             return msg
         except LongResponseException:
             return f"❌ that response is too long :confused: max length is " \
@@ -170,6 +198,8 @@ class AutoResponseCog(commands.Cog, name="Auto Responses"):
                    f"in this server ({settings.responses_limit}), try deleting some"
         except ParseError as e:
             return f"❌ unable to parse that response: `{e}`"
+        except TooComplex as e:
+            return f"❌ that trigger is too complex, {e.message}"
         except NotParseable as e:
             return f"❌ unable to parse your trigger: `{e}`"
         except DisabledException as e:
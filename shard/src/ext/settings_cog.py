@@ -160,7 +160,7 @@ class BotCommands(SettingsElement):
     async def parse(self, ctx, msg, settings):
         if not msg.channel_mentions:
             raise ValueError
-        bc_channels = settings.bot_commands_channels
+        bc_channels = list(settings.bot_commands_channels)
 
         for channel in msg.channel_mentions:
             if channel.id in bc_channels:
@@ -184,12 +184,12 @@ class Admins(SettingsElement):
 
     async def parse(self, ctx, msg, settings):
         member_converter = MemberConverter()
-        admin_ids = settings.admin_ids
+        admin_ids = list(settings.admin_ids)
         try:
             member = await member_converter.convert(ctx, msg.content)
         except CommandError:
             raise ValueError
-        if member.id in settings.admin_ids:
+        if member.id in settings.admin_set:
             admin_ids.remove(member.id)
         else:
             admin_ids.append(member.id)
@@ -240,7 +240,7 @@ class JoinableRoles(SettingsElement):
     async def parse(self, ctx, msg, settings):
         role_converter = RoleConverter()
         new_roles = []
-        roles = settings.roles_dict
+        roles = dict(settings.roles_dict)
         for match in re.finditer(self.pattern, msg.content):
             try:
                 role = await role_converter.convert(ctx, match['role'])
@@ -580,7 +580,7 @@ class Settings(Cog):
         '''settings
         Open an interactive settings dialog.'''
         settings = self.bot.settings[ctx.guild]
-        if ctx.author.id not in settings.admins_ids:
+        if ctx.author.id not in settings.admin_set:
             await ctx.channel.send('nope, sorry, you must be an admin')
             return
 
@@ -1,13 +1,15 @@
+from array import array
 from datetime import timedelta, datetime
-from collections import Counter, defaultdict
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
 
 from discord.ext import commands
 from discord import Forbidden, HTTPException
 import discord
 import json
+import numpy as np
 import pytz
-from typing import Dict, List, Counter as TCounter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 from string import punctuation
 
 import src.generate.wordcount as wordcount_gen
@@ -17,9 +19,136 @@ from lib.ipc import manager_pb2 as message_type
 from src.utils import mention_to_name, doc_url
 
 
+class Codes:
+    """assigns consecutive integer codes to ids, words and the like, in the order they're first seen"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, value: Hashable) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, codes: np.ndarray) -> list:
+        return [self.values[c] for c in codes.tolist()]
+
+
+class CountTable:
+    """
+    Counts keyed by tuples of integer codes, kept as numpy columns.
+
+    A key is packed into one int64, with `keys` giving the name and width in bits of each part.
+    Counts are appended to a buffer as they come in, and the buffer is folded into the sorted
+    table of distinct keys once it's as long as the table, or when the table is read. Each key
+    remembers when it was first counted so that reads can give keys in first-seen order.
+    """
+    BUFFER = 4096
+
+    def __init__(self, keys: Sequence[Tuple[str, int]], counts: Sequence[str] = ('count',)):
+        self.key_names = tuple(name for name, _ in keys)
+        self.count_names = tuple(counts)
+        widths = [bits for _, bits in keys]
+        if sum(widths) > 63:
+            raise ValueError("keys don't fit in an int64")
+        self._shifts = tuple(sum(widths[i + 1:]) for i in range(len(widths)))
+        self._masks = tuple((1 << bits) - 1 for bits in widths)
+
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._first = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros((len(self.count_names), 0), dtype=np.int64)
+        self._seen = 0
+        self._limit = self.BUFFER
+        self._pending_keys = array('q')
+        self._pending_counts = tuple(array('q') for _ in self.count_names)
+
+    def __len__(self):
+        self._compact()
+        return len(self._keys)
+
+    def add(self, key: Tuple[int, ...], *counts: int) -> None:
+        packed = 0
+        for name, code, shift, mask in zip(self.key_names, key, self._shifts, self._masks):
+            if not 0 <= code <= mask:
+                raise ValueError(f"{name} code {code} doesn't fit in its {mask.bit_length()} bits")
+            packed |= code << shift
+        self._pending_keys.append(packed)
+        for column, count in zip(self._pending_counts, counts):
+            column.append(count)
+        if len(self._pending_keys) >= self._limit:
+            self._compact()
+
+    def _compact(self) -> None:
+        pending = len(self._pending_keys)
+        if not pending:
+            return
+        keys = np.concatenate((self._keys, np.frombuffer(self._pending_keys, dtype=np.int64)))
+        first = np.concatenate((self._first, np.arange(self._seen, self._seen + pending, dtype=np.int64)))
+        counts = np.hstack((self._counts, np.array([np.frombuffer(c, dtype=np.int64) for c in self._pending_counts])))
+
+        # the table's keys are distinct and older than the buffer's, so a key's first occurrence
+        # is also its earliest sighting
+        self._keys, index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        self._first = first[index]
+        self._counts = np.zeros((len(self.count_names), len(self._keys)), dtype=np.int64)
+        for total, column in zip(self._counts, counts):
+            np.add.at(total, inverse, column)
+
+        self._seen += pending
+        self._limit = max(self.BUFFER, len(self._keys))
+        self._pending_keys = array('q')
+        self._pending_counts = tuple(array('q') for _ in self.count_names)
+
+    def key(self, name: str) -> np.ndarray:
+        self._compact()
+        i = self.key_names.index(name)
+        return (self._keys >> self._shifts[i]) & self._masks[i]
+
+    def count(self, name: str) -> np.ndarray:
+        self._compact()
+        return self._counts[self.count_names.index(name)]
+
+    def merged(self, by: Sequence[str], count: str, channels: np.ndarray,
+               where: Optional[np.ndarray] = None) -> Tuple[List[np.ndarray], np.ndarray]:
+        """
+        Sums `count` over the rows in `channels` (and `where`, if given) by the `by` key columns.
+        Returns the codes of each `by` column and the sums, with the keys in the order merging the
+        channels' counts one channel after another, in code order, would put them in.
+        """
+        channel = self.key('channel')
+        selected = np.isin(channel, channels)
+        if where is not None:
+            selected &= where
+        rows = np.flatnonzero(selected)
+        rows = rows[np.lexsort((self._first[rows], channel[rows]))]
+
+        columns = [self.key(name)[rows] for name in by]
+        packed = np.zeros(len(rows), dtype=np.int64)
+        for name, column in zip(by, columns):
+            packed |= column << self._shifts[self.key_names.index(name)]
+        _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        sums = np.zeros(len(first), dtype=np.int64)
+        np.add.at(sums, inverse.reshape(-1), self.count(count)[rows])
+
+        order = np.argsort(first)
+        return [column[first[order]] for column in columns], sums[order]
+
+
 class GuildData:
+    """
+    The message statistics of a guild. Counts are kept in `CountTable`s keyed by the integer codes of
+    channels, members, words and time buckets, and are merged across the channels a member can read
+    when they're asked for.
+    """
 
-    def __init__(self, bot, guild, dictionary, time_granularity=timedelta(days=1)):
+    def __init__(self, bot, guild, dictionary, time_granularity=timedelta(days=1), vocabulary=None):
         self.bot = bot
         self._up_to_date_after = pytz.utc.localize(datetime.utcnow())
         self.guild = guild
@@ -32,13 +161,18 @@ class GuildData:
         self._last_activity = {}
         self._message_count = Counter()
         self.correct_word_count = Counter()
-        self.words = defaultdict(Counter)
-        self.correct_words = defaultdict(Counter)
-        self.member_words = defaultdict(Counter)
-        self.mentions = defaultdict(Counter)
-        self.members = defaultdict(Counter)
         self.channels = Counter()
-        self.times = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+
+        self.channel_codes = Codes()
+        self.member_codes = Codes()
+        # shared between guilds by MessageStats, so each word is stored once. Codes are never
+        # given back, so it keeps every word any guild has used for the life of the process
+        self.vocabulary = Codes() if vocabulary is None else vocabulary
+        self.members = CountTable((('channel', 16), ('member', 47)), ('messages', 'words', 'correct'))
+        self.mentions = CountTable((('channel', 16), ('member', 47)))
+        self.words = CountTable((('channel', 16), ('word', 47)))
+        # buckets count `time_granularity`s since the discord epoch, 20 bits is 119 years of hours
+        self.times = CountTable((('channel', 16), ('bucket', 20), ('member', 27)))
 
     def count_correct(self, string):
         '''returns the number of correctly spelled words in a string'''
@@ -57,17 +191,6 @@ class GuildData:
                 filtered.append(w)
         return filtered
 
-    def _merge_counts(self, count: TCounter[TCounter[int]], member: discord.Member) -> TCounter[int]:
-        combined = Counter()
-        for ch_id, count in count.items():
-            ch = self.guild.get_channel(ch_id)
-            if ch is None:
-                continue
-            perms = ch.permissions_for(member)
-            if perms is not None and perms.read_messages and perms.read_message_history:
-                combined.update(count)
-        return combined
-
     def _allowed_channels(self, ch_ids: List[int], member: discord.Member) -> List[int]:
         for ch_id in ch_ids:
             ch = self.guild.get_channel(ch_id)
@@ -77,6 +200,16 @@ class GuildData:
             if perms is not None and perms.read_messages and perms.read_message_history:
                 yield ch_id
 
+    def _allowed_codes(self, member: discord.Member) -> np.ndarray:
+        codes = self.channel_codes.codes
+        return np.array(
+            [codes[i] for i in self._allowed_channels(self.channel_codes.values, member)], dtype=np.int64)
+
+    def _member_counts(self, table: CountTable, count: str, member: discord.Member,
+                       where: Optional[np.ndarray] = None) -> Dict[int, int]:
+        (members,), counts = table.merged(('member',), count, self._allowed_codes(member), where)
+        return dict(zip(self.member_codes.decode(members), counts.tolist()))
+
     @property
     def up_to_date(self):
         return self._up_to_date_after == DISCORD_EPOCH
@@ -102,44 +235,47 @@ class GuildData:
         self._message_count[ch.id] += 1
         self._last_activity[ch.id] = msg.created_at
 
+        channel = self.channel_codes[ch.id]
+        author = self.member_codes[msg.author.id]
         words = [w.lower() for w in msg.content.split()]
-        self.correct_word_count[ch.id] += self.count_correct(msg.content)
-        self.words[ch.id].update(self._filter_words(msg, words))
-        self.correct_words[ch.id][msg.author.id] += self.count_correct(msg.content)
-        self.member_words[ch.id][msg.author.id] += len(words)
+        correct = self.count_correct(msg.content)
+        self.correct_word_count[ch.id] += correct
+        for word in self._filter_words(msg, words):
+            self.words.add((channel, self.vocabulary[word]), 1)
+        self.members.add((channel, author), 1, len(words), correct)
 
-        date = msg.created_at - ((pytz.utc.localize(msg.created_at) - DISCORD_EPOCH) % self.time_granularity)
-        self.times[ch.id][date][msg.author.id] += 1
+        bucket = (pytz.utc.localize(msg.created_at) - DISCORD_EPOCH) // self.time_granularity
+        self.times.add((channel, bucket, author), 1)
 
-        self.mentions[ch.id].update([m.id for m in msg.mentions])
-
-        self.members[ch.id][msg.author.id] += 1
+        for mentioned in msg.mentions:
+            self.mentions.add((channel, self.member_codes[mentioned.id]), 1)
 
         self.channels[ch.id] += 1
 
     def architus_count(self, member: discord.Member):
-        return self._merge_counts(self.members, member).get(self.bot.user.id, 0)
+        return self.member_counts(member).get(self.bot.user.id, 0)
 
     @property
     def member_count(self):
         return self.guild.member_count
 
     def times_as_strings(self, member: discord.Member):
-        """this is disgusting"""
+        """messages sent by each member in each time bucket of the last 90 days, by the bucket's start"""
+        epoch = DISCORD_EPOCH.replace(tzinfo=None)
+        # the first bucket starting at or after the cutoff
+        first = -((epoch - (datetime.now() - timedelta(days=90))) // self.time_granularity)
+        (buckets, members), counts = self.times.merged(
+            ('bucket', 'member'), 'count', self._allowed_codes(member), self.times.key('bucket') >= first)
+
         combined = {}
-        for ch_id in self._allowed_channels(self.times.keys(), member):
-            for date, members in self.times[ch_id].items():
-                if date < datetime.now() - timedelta(days=90):
-                    continue
-                if date in combined:
-                    for member, count in members.items():
-                        if member in combined[date]:
-                            combined[date][member] += count
-                        else:
-                            combined[date][member] = count
-                else:
-                    combined[date] = dict(members)
-        return {k.isoformat(): v for k, v in combined.items()}
+        dates = {}
+        for bucket, member_id, count in zip(buckets.tolist(), self.member_codes.decode(members), counts.tolist()):
+            date = dates.get(bucket)
+            if date is None:
+                date = dates[bucket] = (epoch + bucket * self.time_granularity).isoformat()
+                combined[date] = {}
+            combined[date][member_id] = count
+        return combined
 
     def channel_counts(self, member: discord.Member):
         return {i: self.channels[i] for i in self._allowed_channels(self.channels.keys(), member)}
@@ -158,25 +294,28 @@ class GuildData:
         return last
 
     def member_counts(self, member: discord.Member):
-        return dict(self._merge_counts(self.members, member))
+        return self._member_counts(self.members, 'messages', member)
 
     def correct_counts(self, member: discord.Member):
-        return dict(self._merge_counts(self.correct_words, member))
+        return self._member_counts(self.members, 'correct', member, self.members.count('messages') > 0)
 
     def mention_counts(self, member: discord.Member):
-        return dict(self._merge_counts(self.mentions, member))
+        return self._member_counts(self.mentions, 'count', member)
 
     def mention_count(self, member: discord.Member):
-        return sum(self._merge_counts(self.mentions, member).values())
+        return sum(self.mention_counts(member).values())
 
     def word_count(self, member: discord.Member):
-        return sum(self._merge_counts(self.words, member).values())
+        selected = np.isin(self.words.key('channel'), self._allowed_codes(member))
+        return int(self.words.count('count')[selected].sum())
 
     def word_counts(self, member: discord.Member):
-        return dict(self._merge_counts(self.member_words, member))
+        return self._member_counts(self.members, 'words', member, self.members.count('messages') > 0)
 
     def common_words(self, member: discord.Member):
-        words = self._merge_counts(self.words, member).most_common(75)
+        (codes,), counts = self.words.merged(('word',), 'count', self._allowed_codes(member))
+        top = np.argsort(-counts, kind='stable')[:75]
+        words = list(zip(self.vocabulary.decode(codes[top]), counts[top].tolist()))
         for i, pair in enumerate(words):
             try:
                 name = mention_to_name(self.guild, pair[0])
@@ -195,6 +334,7 @@ class MessageStats(commands.Cog, name="Server Statistics"):
             self.dictionary = json.loads(f.read())
         with open('res/words/stops.json') as f:
             self.stops = json.loads(f.read())
+        self.vocabulary = Codes()
 
     async def cache_guilds_history(self):
         while not all(d.up_to_date for d in self.cache.values()):
@@ -230,7 +370,10 @@ class MessageStats(commands.Cog, name="Server Statistics"):
     @commands.Cog.listener()
     async def on_ready(self):
         logger.debug(f"Caching messages for {len(self.bot.guilds)} guilds...")
-        self.cache = {g.id: GuildData(self.bot, g, (self.dictionary, self.stops)) for g in self.bot.guilds}
+        self.cache = {
+            g.id: GuildData(self.bot, g, (self.dictionary, self.stops), vocabulary=self.vocabulary)
+            for g in self.bot.guilds
+        }
         await self.cache_guilds_history()
         logger.debug(f"Message cache up-to-date for {len(self.bot.guilds)} guilds...")
 
@@ -245,7 +388,8 @@ class MessageStats(commands.Cog, name="Server Statistics"):
         if before != self.bot.user:
             return
         if before.guild_permissions != after.guild_permissions:
-            self.cache[before.guild.id] = GuildData(self.bot, before.guild, (self.dictionary, self.stops))
+            self.cache[before.guild.id] = GuildData(
+                self.bot, before.guild, (self.dictionary, self.stops), vocabulary=self.vocabulary)
             await self.cache_guilds_history()
 
     @commands.Cog.listener()
@@ -260,15 +404,13 @@ class MessageStats(commands.Cog, name="Server Statistics"):
         Run again to reallow collection.
         """
         settings = self.bot.settings[ctx.guild]
-        excludes = settings.stats_exclude
         author = ctx.author
-        if author.id in excludes:
-            excludes.remove(author.id)
+        if author.id in settings.stats_exclude:
+            settings.stats_exclude = settings.stats_exclude - {author.id}
             await ctx.send(f"{author.display_name}'s message data is now available")
         else:
-            excludes.append(author.id)
+            settings.stats_exclude = settings.stats_exclude | {author.id}
             await ctx.send(f"{author.display_name}'s message data is now hidden")
-        settings.stats_exclude = excludes
 
     @commands.command(aliases=['growth'])
     @doc_url("https://docs.archit.us/commands/statistics/#joins")
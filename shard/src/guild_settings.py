@@ -1,23 +1,130 @@
 import json
+from asyncio import Lock, sleep
+from collections import OrderedDict
 from lib.models import Settings
 from lib.aiomodels import TbSettings
-from lib.config import logger, FAKE_GUILD_IDS
+from lib.config import logger, FAKE_GUILD_IDS, SETTINGS_FLUSH_INTERVAL
 from sqlalchemy.orm.exc import NoResultFound
 from discord.ext.commands import Cog
 import discord
-from typing import List, Optional
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, List, Mapping, Optional, Tuple
 
 RYTHMS_ID = 235088799074484224
 
 
+def _id_set(ids: Iterable) -> FrozenSet[int]:
+    return frozenset(int(i) for i in ids)
+
+
+def _id_tuple(ids: Iterable) -> Tuple[int, ...]:
+    """ids in their stored order without repeats"""
+    return tuple(dict.fromkeys(int(i) for i in ids))
+
+
+def _roles(roles: Mapping) -> Mapping[str, int]:
+    # TODO db migration for str ids. can remove after every server has updated
+    return MappingProxyType({str(k): int(v) for k, v in roles.items()})
+
+
+# settings that are parsed once when they're loaded or set, by their key in the json blob.
+# each takes the stored value and raises TypeError, ValueError or AttributeError if it's malformed
+PARSERS = {
+    'admins': _id_set,
+    'stats_exclude': _id_set,
+    'bot_commands': _id_tuple,
+    'roles_dict': _roles,
+    'default_role': int,
+}
+
+
+def _to_json(value):
+    """the form a parsed setting is stored in"""
+    if isinstance(value, frozenset):
+        return sorted(value)
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    return value
+
+
+class SettingsWriter:
+    """
+    Writes guild settings behind their setters. Changing a setting marks its guild dirty and the
+    guild's blob is written `interval` seconds after the first unwritten change, so a burst of
+    changes costs one write. Writes go out one at a time in the order guilds became dirty, each
+    with the settings as they are when it's sent, so a later write never carries older settings.
+    """
+
+    def __init__(self, bot, interval=SETTINGS_FLUSH_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self.tb_settings = TbSettings(bot.asyncpg_wrapper)
+        self.dirty = OrderedDict()
+        self.writes = 0
+        self.failures = 0
+        self._timer = None
+        self._lock = Lock()
+
+    @property
+    def pending(self) -> int:
+        """how many guilds have changes that haven't been written"""
+        return len(self.dirty)
+
+    def stats(self) -> dict:
+        return {'pending': self.pending, 'writes': self.writes, 'failures': self.failures}
+
+    def mark(self, setting: 'Setting') -> None:
+        self.dirty.setdefault(setting.guild.id, setting)
+        if self._timer is None:
+            self._timer = self.bot.loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await sleep(self.interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """write every guild that is dirty now, guilds changed in the meantime wait for the next flush"""
+        async with self._lock:
+            batch, self.dirty = self.dirty, OrderedDict()
+            while batch:
+                guild_id, setting = next(iter(batch.items()))
+                try:
+                    await self.tb_settings.update_by_id({'json_blob': json.dumps(setting._settings_dict)}, guild_id)
+                except Exception:
+                    logger.exception(f"couldn't write settings for {len(batch)} guilds, retrying later")
+                    self.failures += 1
+                    # keep the unwritten guilds ahead of any changed since
+                    batch.update(self.dirty)
+                    self.dirty = batch
+                    if self._timer is None:
+                        self._timer = self.bot.loop.create_task(self._flush_later())
+                    return
+                del batch[guild_id]
+                self.writes += 1
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
 class Setting:
 
-    def __init__(self, bot, guild):
+    def __init__(self, bot, guild, writer=None):
         self.tb_settings = TbSettings(bot.asyncpg_wrapper)
         self.bot = bot
         self.session = bot.session
         self.guild = guild
+        self.writer = writer
         self._settings_dict = {}
+        self._parsed = {}
+        # built on first use and dropped by GuildSettings when roles, members or the owner change
+        self._admin_set = None
+        self._admins_ids = None
+        self._bot_commands_set = None
 
     @property
     def command_prefix(self) -> str:
@@ -232,55 +339,78 @@ class Setting:
         self._update_db()
 
     @property
-    def roles_dict(self) -> dict:
-        roles = self._settings_dict['roles_dict'] if 'roles_dict' in self._settings_dict else {}
-        # TODO db migration for str ids. can remove after every server has updated
-        return {k: int(v) for k, v in roles.items()}
+    def roles_dict(self) -> Mapping[str, int]:
+        return self._parsed.get('roles_dict', MappingProxyType({}))
 
     @roles_dict.setter
-    def roles_dict(self, roles_dict: dict):
-        self._settings_dict['roles_dict'] = roles_dict
-        self._update_db()
+    def roles_dict(self, roles_dict: Mapping[str, int]):
+        self._set('roles_dict', roles_dict)
 
     @property
     def default_role_id(self) -> int:
-        return int(self._settings_dict['default_role']) if 'default_role' in self._settings_dict else 0
+        return self._parsed.get('default_role', 0)
 
     @default_role_id.setter
     def default_role_id(self, new_id: int):
-        self._settings_dict['default_role'] = new_id
-        self._update_db()
+        self._set('default_role', new_id)
 
     @property
-    def bot_commands_channels(self) -> List[int]:
-        return self._settings_dict['bot_commands'] if 'bot_commands' in self._settings_dict else []
+    def bot_commands_channels(self) -> Tuple[int, ...]:
+        """kept in order, as the first channel is the one members get pointed to"""
+        return self._parsed.get('bot_commands', ())
 
     @bot_commands_channels.setter
-    def bot_commands_channels(self, new_bot_commands: List[int]):
-        self._settings_dict['bot_commands'] = new_bot_commands
-        self._update_db()
+    def bot_commands_channels(self, new_bot_commands: Iterable[int]):
+        self._set('bot_commands', new_bot_commands)
+        self._bot_commands_set = None
+
+    @property
+    def bot_commands_set(self) -> FrozenSet[int]:
+        """the bot commands channels, for checking whether a channel is one"""
+        if self._bot_commands_set is None:
+            self._bot_commands_set = frozenset(self.bot_commands_channels)
+        return self._bot_commands_set
 
     @property
-    def stats_exclude(self) -> List[int]:
-        return list(set(self._settings_dict.get('stats_exclude', [])))
+    def stats_exclude(self) -> FrozenSet[int]:
+        return self._parsed.get('stats_exclude', frozenset())
 
     @stats_exclude.setter
-    def stats_exclude(self, new_excludes: List[int]) -> None:
-        self._settings_dict['stats_exclude'] = new_excludes
-        self._update_db()
+    def stats_exclude(self, new_excludes: Iterable[int]) -> None:
+        self._set('stats_exclude', new_excludes)
 
     @property
-    def admin_ids(self) -> List[int]:
+    def admin_ids(self) -> Tuple[int, ...]:
         '''stupid alias'''
         return self.admins_ids
 
     @property
-    def admins_ids(self) -> List[int]:
-        default_admins = [self.guild.owner.id]
-        default_admins += [m.id for role in self.guild.roles for m in role.members if role.permissions.administrator]
-        default_admins += [self.guild.owner.id]
-
-        return list(set(default_admins + [int(a) for a in self._settings_dict.get('admins', [])]))
+    def admins_ids(self) -> Tuple[int, ...]:
+        if self._admins_ids is not None:
+            return self._admins_ids
+        admins_ids = tuple(sorted(self.admin_set))
+        if self._admin_set is not None:
+            self._admins_ids = admins_ids
+        return admins_ids
+
+    @property
+    def admin_set(self) -> FrozenSet[int]:
+        """the owner, members with an administrator role and the configured admins"""
+        if self._admin_set is not None:
+            return self._admin_set
+        admins = {self.guild.owner_id}
+        admins.update(m.id for role in self.guild.roles if role.permissions.administrator for m in role.members)
+        admins.update(self._parsed.get('admins', ()))
+        admin_set = frozenset(admins)
+        # role.members only holds cached members, and nothing tells us when the guild finishes
+        # chunking, so the set is only kept once every member is in the cache
+        if self.guild.chunked:
+            self._admin_set = admin_set
+        return admin_set
+
+    def invalidate_admins(self) -> None:
+        self._admin_set = None
+        self._admins_ids = None
 
     @admin_ids.setter
     def admin_ids(self, new_admins: List[int]):
@@ -289,8 +419,8 @@ class Setting:
 
     @admins_ids.setter
     def admins_ids(self, new_admins: List[int]):
-        self._settings_dict['admins'] = new_admins
-        self._update_db()
+        self._set('admins', new_admins)
+        self.invalidate_admins()
 
     @property
     def bot_emoji(self) -> str:
@@ -373,9 +503,30 @@ class Setting:
         self._settings_dict['emojis'] = new_emojis
         self._update_db()
 
+    def _load(self, settings_dict: dict) -> None:
+        """use the settings from a stored blob, parsing the keys in PARSERS"""
+        self._settings_dict = settings_dict
+        self._parsed = {}
+        for key, parse in PARSERS.items():
+            if key not in settings_dict:
+                continue
+            try:
+                self._parsed[key] = parse(settings_dict[key])
+            except (TypeError, ValueError, AttributeError):
+                # the stored value is kept as is, but the default is used in its place
+                logger.warning(f"malformed {key} setting for {self.guild.id}: {settings_dict[key]!r}")
+        self._bot_commands_set = None
+        self.invalidate_admins()
+
+    def _set(self, key: str, value) -> None:
+        parsed = PARSERS[key](value)
+        self._parsed[key] = parsed
+        self._settings_dict[key] = _to_json(parsed)
+        self._update_db()
+
     def _load_from_db(self) -> dict:
         if self.guild.id < FAKE_GUILD_IDS:
-            self._settings_dict = {}
+            self._load({})
             return
         settings_row = None
         try:
@@ -384,11 +535,11 @@ class Setting:
             new_guild = Settings(int(self.guild.id), json.dumps({}))
             self.session.add(new_guild)
         self.session.commit()
-        self._settings_dict = json.loads(settings_row.json_blob) if settings_row else {}
+        self._load(json.loads(settings_row.json_blob) if settings_row else {})
 
     async def _async_load_from_db(self) -> dict:
         if self.guild.id < FAKE_GUILD_IDS:
-            self._settings_dict = {}
+            self._load({})
             return
 
         try:
@@ -398,35 +549,31 @@ class Setting:
         except Exception:
             logger.exception(f'error initializing loading guild settings for {self.guild.id}')
 
-        self._settings_dict = json.loads(row['json_blob']) if row else {}
+        self._load(json.loads(row['json_blob']) if row else {})
 
     def _update_db(self):
+        """queue the settings to be written, see SettingsWriter"""
         if self.guild.id < FAKE_GUILD_IDS:
             return
-        new_data = {
-            'json_blob': json.dumps(self._settings_dict)
-        }
-        try:
-            self.bot.loop.create_task(self.tb_settings.update_by_id(new_data, self.guild.id))
-        except Exception:
-            logger.exception(f'error saving settings for {self.guild.id}')
+        self.writer.mark(self)
 
 
 class AsyncSettings:
-    def __init__(self, bot, guilds):
+    def __init__(self, bot, guilds, writer):
         self.bot = bot
         self.guilds = guilds
+        self.writer = writer
 
     def __getitem__(self, key):
         return self.get(key)
 
     async def get(self, guild):
         if guild is None:
-            return Setting(self.bot, guild)
+            return Setting(self.bot, guild, self.writer)
         try:
             return self.guilds[guild]
         except KeyError:
-            self.guilds[guild] = Setting(self.bot, guild)
+            self.guilds[guild] = Setting(self.bot, guild, self.writer)
             await self.guilds[guild]._async_load_from_db()
             return self.guilds[guild]
 
@@ -436,21 +583,101 @@ class GuildSettings(Cog):
     def __init__(self, bot):
         self.bot = bot
         self.guilds = {}
-        self.aio = AsyncSettings(bot, self.guilds)
+        self.writer = SettingsWriter(bot)
+        self.aio = AsyncSettings(bot, self.guilds, self.writer)
+
+    def cog_unload(self):
+        self.writer.cancel()
+        self.bot.loop.create_task(self.writer.flush())
+
+    async def flush(self):
+        """write any settings changes still waiting, called when the bot shuts down"""
+        await self.writer.flush()
 
     def __getitem__(self, key):
         return self.get_guild(key)
 
     def get_guild(self, guild):
         if guild is None:
-            return Setting(self.bot, guild)
+            return Setting(self.bot, guild, self.writer)
         try:
             return self.guilds[guild]
         except KeyError:
-            self.guilds[guild] = Setting(self.bot, guild)
+            # every guild the shard starts with is preloaded, so this is a guild joined since or a
+            # guild used before the preload finished, and it blocks the loop until postgres answers
+            logger.info(f"settings for {guild.id} weren't preloaded, loading them synchronously")
+            self.guilds[guild] = Setting(self.bot, guild, self.writer)
             self.guilds[guild]._load_from_db()
             return self.guilds[guild]
 
+    async def preload(self, guilds) -> None:
+        """
+        Load the settings of every guild not loaded yet with one query, adding empty settings
+        for the guilds that have none.
+        """
+        guilds = [g for g in guilds if g not in self.guilds]
+        ids = [g.id for g in guilds if g.id >= FAKE_GUILD_IDS]
+        if not ids:
+            return
+        tb_settings = self.writer.tb_settings
+        blobs = {row['guild_id']: row['json_blob'] for row in await tb_settings.select_by_guild_ids(ids)}
+        missing = [i for i in ids if i not in blobs]
+        if missing:
+            await tb_settings.insert_defaults(missing)
+        for guild in guilds:
+            # a guild may have been loaded some other way while we were waiting on the database
+            if guild in self.guilds:
+                continue
+            setting = Setting(self.bot, guild, self.writer)
+            setting._load(json.loads(blobs.get(guild.id, '{}')))
+            self.guilds[guild] = setting
+        logger.info(f"preloaded settings for {len(ids)} guilds, {len(missing)} of them new")
+
+    @Cog.listener()
+    async def on_ready(self):
+        try:
+            await self.preload(self.bot.guilds)
+        except Exception:
+            logger.exception("couldn't preload guild settings, they'll be loaded as they're used")
+
+    @Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.aio.get(guild)
+
+    def _invalidate_admins(self, guild) -> None:
+        setting = self.guilds.get(guild)
+        if setting is not None:
+            setting.invalidate_admins()
+
+    @Cog.listener()
+    async def on_guild_role_create(self, role):
+        self._invalidate_admins(role.guild)
+
+    @Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._invalidate_admins(role.guild)
+
+    @Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.permissions.administrator != after.permissions.administrator:
+            self._invalidate_admins(after.guild)
+
+    @Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self._invalidate_admins(after.guild)
+
+    @Cog.listener()
+    async def on_member_remove(self, member):
+        setting = self.guilds.get(member.guild)
+        if setting is not None and member.id in (setting._admin_set or ()):
+            setting.invalidate_admins()
+
+    @Cog.listener()
+    async def on_guild_update(self, before, after):
+        if before.owner_id != after.owner_id:
+            self._invalidate_admins(after)
+
 
 def setup(bot):
     bot.add_cog(GuildSettings(bot))
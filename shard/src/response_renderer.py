@@ -0,0 +1,137 @@
+"""
+Flattens response ASTs into render plans.
+
+A plan is a tuple of steps. Runs of plain text are joined into a single string step when the plan is
+compiled, so rendering only has to do work for the dynamic parts of a response. Lists become a CHOICE
+step holding one plan per element.
+"""
+from random import randrange
+from typing import Dict, List, Optional, Tuple, Union
+
+from lib.response_grammar.response import NodeType
+
+# dynamic step kinds, a step is either a str or a (kind, arg) tuple
+CHOICE = 0
+REACT = 1
+NOUN = 2
+ADJ = 3
+ADV = 4
+COUNT = 5
+MEMBER = 6
+AUTHOR = 7
+CAPTURE = 8
+URL = 9
+EVAL = 10
+
+SIMPLE_STEPS = {
+    NodeType.Noun: NOUN,
+    NodeType.Adj: ADJ,
+    NodeType.Adv: ADV,
+    NodeType.Count: COUNT,
+    NodeType.Member: MEMBER,
+    NodeType.Author: AUTHOR,
+}
+
+Step = Union[str, Tuple[int, object]]
+
+
+class RenderPlan:
+    """
+    The compiled form of a response.
+
+    `text` is the whole response if it's only plain text, in which case nothing needs to be rendered
+    per message.
+    """
+    __slots__ = ('steps', 'text')
+
+    def __init__(self, steps: Tuple[Step, ...]):
+        self.steps = steps
+        if all(type(s) is str for s in steps):
+            self.text = "".join(steps)
+        else:
+            self.text = None
+
+
+def _compile(nodes, steps: List[Step]) -> List[Step]:
+    for node in nodes:
+        if node.type == NodeType.PlainText:
+            if steps and type(steps[-1]) is str:
+                steps[-1] += node.text
+            else:
+                steps.append(node.text)
+        elif node.type == NodeType.List:
+            steps.append((CHOICE, tuple(tuple(_compile(e.children, [])) for e in node.children)))
+        elif node.type == NodeType.ListElement:
+            _compile(node.children, steps)
+        elif node.type in SIMPLE_STEPS:
+            steps.append((SIMPLE_STEPS[node.type], None))
+        elif node.type == NodeType.React:
+            steps.append((REACT, (node.id, node.shortcode)))
+        elif node.type == NodeType.Capture:
+            steps.append((CAPTURE, node.capture_group))
+        elif node.type == NodeType.Url:
+            steps.append((URL, node.text))
+        elif node.type == NodeType.Eval:
+            steps.append((EVAL, node.text))
+    return steps
+
+
+def compile_plan(response_ast) -> RenderPlan:
+    return RenderPlan(tuple(_compile(response_ast.children, [])))
+
+
+class MemberSampler:
+    """
+    Picks random members of a guild without copying `guild.members` every time.
+
+    Keeps the ids of the guild's members in a list with their positions so they can be added and
+    removed in constant time. Ids that no longer resolve to a member are dropped when they're drawn.
+    The list is seeded from `guild.members` on the first draw, and joins and leaves are ignored until
+    then. If the guild's member cache wasn't chunked yet when it was seeded, it's seeded again once
+    it's chunked or the number of cached members changes, which is read from `guild._members` since
+    `guild.members` is a copy.
+    """
+
+    def __init__(self):
+        self._ids = []
+        self._positions: Dict[int, int] = {}
+        self._seeded = False
+        self._seeded_from = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, member_id: int) -> None:
+        if self._seeded and member_id not in self._positions:
+            self._positions[member_id] = len(self._ids)
+            self._ids.append(member_id)
+
+    def remove(self, member_id: int) -> None:
+        if self._seeded:
+            self._discard(member_id)
+
+    def _discard(self, member_id: int) -> None:
+        i = self._positions.pop(member_id, None)
+        if i is None:
+            return
+        last = self._ids.pop()
+        if last != member_id:
+            self._ids[i] = last
+            self._positions[last] = i
+
+    def reset(self, guild) -> None:
+        self._ids = [m.id for m in guild.members]
+        self._positions = {member_id: i for i, member_id in enumerate(self._ids)}
+        self._seeded = guild.chunked
+        self._seeded_from = len(guild._members)
+
+    def sample(self, guild) -> Optional[object]:
+        if not self._seeded and (guild.chunked or len(guild._members) != self._seeded_from):
+            self.reset(guild)
+        while self._ids:
+            member_id = self._ids[randrange(len(self._ids))]
+            member = guild.get_member(member_id)
+            if member is not None:
+                return member
+            self._discard(member_id)
+        return None
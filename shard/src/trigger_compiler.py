@@ -0,0 +1,150 @@
+"""
+Turns auto response triggers into serialized Reggy automata.
+
+Parsing a trigger and building its FSM is pure python, so doing it on a thread holds the GIL
+away from the event loop. TriggerCompiler runs the work in a pool of worker processes instead
+and hands back only plain data, which AutoResponse loads with Reggy.from_json.
+"""
+import string
+from asyncio import Semaphore
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from pickle import PicklingError
+from typing import Optional, Tuple
+
+from lib.reggy.fsm import Budget
+from lib.reggy.reggy import Reggy, TooComplex
+from lib.config import logger, REGEX_MAX_STATES, REGEX_MAX_ALPHABET, REGEX_COMPILE_SECONDS
+
+BUDGET = Budget(max_states=REGEX_MAX_STATES, max_alphabet=REGEX_MAX_ALPHABET, seconds=REGEX_COMPILE_SECONDS)
+
+# how compiles of new triggers went against the budget: 'within', or the limit that was hit
+budget_decisions = Counter()
+
+
+class ResponseMode:
+
+    REGEX = 'regex'
+    PUNCTUATED = 'punctuated'
+    NAIVE = 'naive'
+
+
+def determine_mode(trigger: str) -> str:
+    """determine the mode of an AutoResponse based on a trigger string"""
+    with suppress(IndexError):
+        if trigger[0] == '^' and trigger[-1] == '$':
+            return ResponseMode.REGEX
+
+    if any(c for c in trigger if c in string.punctuation):
+        return ResponseMode.PUNCTUATED
+
+    return ResponseMode.NAIVE
+
+
+def extract_punctuation(trigger: str) -> Tuple[str, ...]:
+    return tuple(c for c in trigger if c in string.punctuation)
+
+
+def generate_trigger_regex(trigger: str, mode: str, trigger_punctuation: Tuple[str, ...]) -> str:
+    special_chars = ['\\', '.', '*', '+', '?', '[', ']', '(', ')', '|']
+    pattern = trigger.lower()
+
+    if mode == ResponseMode.REGEX:
+        pattern = pattern[1:-1]
+    elif mode == ResponseMode.PUNCTUATED:
+        for c in string.punctuation:
+            if c not in trigger_punctuation:
+                pattern = pattern.replace(c, "")
+        for c in special_chars:
+            pattern = pattern.replace(c, f"\\{c}")
+    elif mode == ResponseMode.NAIVE:
+        for c in string.punctuation:
+            pattern = pattern.replace(c, "")
+        for c in special_chars:
+            pattern = pattern.replace(c, f"\\{c}")
+    else:
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    return pattern
+
+
+def compile_trigger(
+        trigger: str,
+        mode: Optional[str] = None,
+        trigger_punctuation: Tuple[str, ...] = (),
+        trigger_regex: str = "",
+        budget: Optional[Budget] = None) -> Tuple[str, Tuple[str, ...], str, str]:
+    """
+    Work out whatever isn't given of a trigger's mode, punctuation and regex and compile it within
+    `budget`. Returns those along with the serialized Reggy.
+
+    New triggers are compiled within BUDGET. Stored triggers being recompiled get no budget, so
+    responses that were accepted before a limit existed or was lowered keep loading.
+    """
+    if mode is None:
+        mode = determine_mode(trigger)
+    if mode == ResponseMode.PUNCTUATED and not trigger_punctuation:
+        trigger_punctuation = extract_punctuation(trigger)
+    if trigger_regex == "":
+        trigger_regex = generate_trigger_regex(trigger, mode, trigger_punctuation)
+    return mode, tuple(trigger_punctuation), trigger_regex, Reggy(trigger_regex, budget=budget).to_json()
+
+
+class TriggerCompiler:
+    """
+    Compiles triggers in worker processes.
+
+    At most `max_queued` jobs are submitted at once, later callers wait for a slot. There's no
+    wall clock timeout here, since that would count time spent waiting in the queue: the time a
+    compile may take is limited inside the worker by its budget's deadline. If the pool can't be
+    used the trigger is compiled in this process on `fallback_executor` instead.
+    """
+
+    def __init__(self, loop, max_workers: int = 2, max_queued: int = 32, fallback_executor=None):
+        self.loop = loop
+        self.max_workers = max_workers
+        self.fallback_executor = fallback_executor
+        self._slots = Semaphore(max_queued)
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _discard_pool(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def compile(
+            self, trigger: str, mode: Optional[str] = None, trigger_punctuation: Tuple[str, ...] = (),
+            trigger_regex: str = "", budget: Optional[Budget] = None) -> Tuple[str, Tuple[str, ...], str, str]:
+        args = (trigger, mode, tuple(trigger_punctuation), trigger_regex, budget)
+        if budget is None:
+            return await self._compile(args)
+        try:
+            result = await self._compile(args)
+        except TooComplex as e:
+            budget_decisions[e.reason] += 1
+            logger.info(f"trigger '{trigger}' went over the compile budget: {e.message}")
+            raise
+        budget_decisions['within'] += 1
+        return result
+
+    async def _compile(self, args):
+        async with self._slots:
+            try:
+                return await self._run(self._get_pool(), args)
+            except (BrokenProcessPool, PicklingError, OSError):
+                logger.exception(f"trigger compiler pool unavailable, compiling '{args[0]}' in process")
+                self._discard_pool()
+            return await self._run(self.fallback_executor, args)
+
+    async def _run(self, executor, args):
+        return await self.loop.run_in_executor(executor, compile_trigger, *args)
+
+    def shutdown(self) -> None:
+        self._discard_pool()
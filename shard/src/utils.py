@@ -123,8 +123,8 @@ def bot_commands_only(cmd):
         if ctx.guild:
             settings = self.bot.settings[ctx.guild]
             if settings.bot_commands_channels\
-                    and ctx.channel.id not in settings.bot_commands_channels\
-                    and ctx.author.id not in settings.admin_ids:
+                    and ctx.channel.id not in settings.bot_commands_set\
+                    and ctx.author.id not in settings.admin_set:
 
                 for channel_id in settings.bot_commands_channels:
                     bc_ch = discord.utils.get(ctx.guild.channels, id=channel_id)
@@ -0,0 +1,172 @@
+"""
+Word lists used by the [noun], [adj] and [adv] response tokens.
+
+The lists are loaded once per process into a single packed buffer of utf-8 words with an array of
+offsets. The packed form is also written to WORD_STORE_PATH and memory mapped, so every shard on a
+node that points at the same file shares one copy of the pages.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from random import randrange
+from threading import Lock
+from typing import Dict, Optional
+
+from lib.config import logger, WORD_STORE_PATH
+
+SOURCES = (
+    ('nouns', 'res/words/nouns.txt'),
+    ('adjs', 'res/words/adjectives.txt'),
+    ('advs', 'res/words/adverbs.txt'),
+)
+
+MAGIC = b'AWRD'
+VERSION = 2
+# magic, version, fingerprint of the source files, number of lists, crc32 of everything after the header
+HEADER = struct.Struct('<4sI20sII')
+# number of words in a list, length of its packed words in bytes
+LIST_HEADER = struct.Struct('<II')
+
+
+class WordList:
+    """
+    An immutable list of words stored as one buffer of utf-8 bytes and the offsets between them.
+    """
+
+    def __init__(self, data: memoryview, offsets: memoryview):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if not -len(self) <= i < len(self):
+            raise IndexError("word index out of range")
+        i %= len(self)
+        return str(self._data[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def choice(self) -> str:
+        return self[randrange(len(self))]
+
+
+def _pad(n: int) -> int:
+    return -n % 4
+
+
+def _fingerprint() -> bytes:
+    h = hashlib.sha1()
+    for _, path in SOURCES:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.digest()
+
+
+def _pack(fingerprint: bytes) -> bytes:
+    parts = []
+    for _, path in SOURCES:
+        with open(path) as f:
+            words = sorted({w.strip() for w in f} - {''})
+        encoded = [w.encode() for w in words]
+        offsets = array('I', [0])
+        for w in encoded:
+            offsets.append(offsets[-1] + len(w))
+        data = b''.join(encoded)
+        parts.append(LIST_HEADER.pack(len(words), len(data)))
+        parts.append(offsets.tobytes())
+        parts.append(data + b'\0' * _pad(len(data)))
+    body = b''.join(parts)
+    return HEADER.pack(MAGIC, VERSION, fingerprint, len(SOURCES), zlib.crc32(body)) + body
+
+
+def _unpack(buffer, fingerprint: bytes) -> Optional[Dict[str, WordList]]:
+    """the lists in a packed buffer, None if it's out of date, truncated or otherwise malformed"""
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        return None
+    magic, version, stored_fingerprint, count, crc = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or stored_fingerprint != fingerprint or count != len(SOURCES):
+        return None
+    if zlib.crc32(view[HEADER.size:]) != crc:
+        return None
+    lists = {}
+    pos = HEADER.size
+    for name, _ in SOURCES:
+        if pos + LIST_HEADER.size > len(view):
+            return None
+        words, size = LIST_HEADER.unpack_from(view, pos)
+        pos += LIST_HEADER.size
+        if pos + 4 * (words + 1) + size + _pad(size) > len(view):
+            return None
+        offsets = view[pos:pos + 4 * (words + 1)].cast('I')
+        pos += 4 * (words + 1)
+        if offsets[0] != 0 or offsets[-1] != size:
+            return None
+        lists[name] = WordList(view[pos:pos + size], offsets)
+        pos += size + _pad(size)
+    if pos != len(view):
+        return None
+    return lists
+
+
+def _map(path: str, fingerprint: bytes) -> Optional[Dict[str, WordList]]:
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return _unpack(mapped, fingerprint)
+    except (struct.error, TypeError, ValueError, IndexError):
+        logger.exception(f"word store at {path} is corrupt, rebuilding it")
+        return None
+
+
+def _write(path: str, packed: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(packed)
+    os.replace(tmp, path)
+
+
+class WordStore:
+    """The process wide word lists, get one with `word_store()`."""
+
+    def __init__(self, lists: Dict[str, WordList]):
+        self.nouns = lists['nouns']
+        self.adjs = lists['adjs']
+        self.advs = lists['advs']
+
+    @classmethod
+    def load(cls, path: Optional[str] = WORD_STORE_PATH) -> 'WordStore':
+        fingerprint = _fingerprint()
+        if path:
+            lists = _map(path, fingerprint)
+            if lists is not None:
+                return cls(lists)
+        packed = _pack(fingerprint)
+        if path:
+            try:
+                _write(path, packed)
+                lists = _map(path, fingerprint)
+                if lists is not None:
+                    return cls(lists)
+            except OSError:
+                logger.exception(f"couldn't write word store to {path}, keeping it in memory")
+        return cls(_unpack(packed, fingerprint))
+
+
+_store = None
+_store_lock = Lock()
+
+
+def word_store() -> WordStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WordStore.load()
+    return _store
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from src.guild_settings import Setting
+
+OWNER_ID = 1
+ADMIN_ID = 2
+MEMBER_ID = 3
+
+
+def make_guild():
+    admin_role = SimpleNamespace(permissions=SimpleNamespace(administrator=True), members=[])
+    member_role = SimpleNamespace(permissions=SimpleNamespace(administrator=False), members=[])
+    return SimpleNamespace(id=1234, owner_id=OWNER_ID, roles=[member_role, admin_role], chunked=False)
+
+
+def make_setting(guild, admins=()):
+    bot = SimpleNamespace(asyncpg_wrapper=None, session=None)
+    setting = Setting(bot, guild)
+    setting._load({'admins': list(admins)})
+    return setting
+
+
+def test_admin_set_before_and_after_members_are_cached():
+    guild = make_guild()
+    setting = make_setting(guild, admins=[MEMBER_ID])
+    admin_role = guild.roles[1]
+
+    assert setting.admin_set == {OWNER_ID, MEMBER_ID}
+    assert setting.admins_ids == (OWNER_ID, MEMBER_ID)
+
+    # the guild finishes chunking, which doesn't invalidate anything
+    admin_role.members = [SimpleNamespace(id=ADMIN_ID)]
+    guild.chunked = True
+
+    assert setting.admin_set == {OWNER_ID, ADMIN_ID, MEMBER_ID}
+    assert setting.admins_ids == (OWNER_ID, ADMIN_ID, MEMBER_ID)
+
+
+def test_admin_set_is_kept_once_chunked():
+    guild = make_guild()
+    guild.chunked = True
+    setting = make_setting(guild)
+
+    assert setting.admin_set is setting.admin_set
+    assert setting.admins_ids is setting.admins_ids
+
+    guild.roles[1].members = [SimpleNamespace(id=ADMIN_ID)]
+    assert ADMIN_ID not in setting.admin_set
+    setting.invalidate_admins()
+    assert ADMIN_ID in setting.admin_set